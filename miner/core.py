@@ -3,6 +3,8 @@ from datetime import date, timedelta
 import multiprocessing as mp
 from contextlib import contextmanager
 import multiprocessing.queues as mpq
+from threading import Lock, local
+from functools import wraps
 import time
 
 # Pip package imports
@@ -31,11 +33,14 @@ class IHandler(object):
         self._converter = kwargs.get('converter', Converter)
 
         self._config = { **IHandler.config , **kwargs.get('config', {})}
+        # Dimension rows converted during the current run
+        self._cache = DimensionCache()
 
     def fetch_dates(self, *args, **kwargs):
         # Get the input parameters
-        start = convert_datetime(kwargs.get('start', date.today()))
-        end = convert_datetime(kwargs.get('end', start + timedelta(days=0)))
+        start, end = self._date_range(**kwargs)
+        # Every run starts with an empty dimension cache, shared by all the converters of the run
+        self._cache = DimensionCache()
 
         start_time = time.time()
         result = self._do_fetch(start, end, **kwargs)
@@ -44,6 +49,12 @@ class IHandler(object):
             logger.info("[%s] fetching data from %s to %s took %0.2f sec." % (self._name, start, end, time_took))
         return result
 
+    @staticmethod
+    def _date_range(**kwargs):
+        start = convert_datetime(kwargs.get('start', date.today()))
+        end = convert_datetime(kwargs.get('end', start + timedelta(days=0)))
+        return start, end
+
     def _do_fetch(self, start_date, end_date, *args, **kwargs):
         for curr_date in date_interval(start_date, end_date):
             yield self._fetch_date(curr_date, **kwargs)
@@ -54,6 +65,9 @@ class IHandler(object):
     def _get_config(self, *args):
         return get_nested(self._config, *args)
 
+    def _make_converter(self, **kwargs):
+        return self._converter(cache=self._cache, **kwargs)
+
     def info(self, msg):
         name = "[%s] " % self._name
         logger.info(name + msg)
@@ -72,13 +86,36 @@ class IHandler(object):
 class Converter(object):
 
     def __init__(self, *args, **kwargs):
+        cache = kwargs.get('cache', None)
+        self._cache = cache if cache is not None else DimensionCache()
+        # Fact rows of the converter, the workers sharing the converter append without contention
+        self._rows = RowBuffer()
+        self._closed = False
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        self._closed = False
+        return self
+
+    def flush(self):
+        """Write out the buffered data to the sink of the converter."""
         pass
 
-    def __del__(self):
-        try:
-            self.get()
-        except Exception:
-            pass
+    def close(self):
+        """Finalize the converter. Only the first call flushes, so closing again (or garbage collection) is cheap."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+
+    @property
+    def closed(self):
+        return self._closed
 
     def put(self, object):
         pass
@@ -86,6 +123,135 @@ class Converter(object):
     def get(self):
         return None
 
+    def update_fifa_stat_range(self, player_id, start_date, end_date, fifa_stat, match_ids=()):
+        """Update the fifa stat of the player for the matches played between the dates. The converters without
+        a set-based update write the given matches of the interval one by one.
+        """
+        for match_id in match_ids:
+            self.update_fifa_stat(player_id, match_id, fifa_stat)
+
+
+class DimensionCache(object):
+    """Identity-keyed store of the dimension rows (teams, seasons, players, ...) converted during a run.
+    The same instance is shared by every converter of the run, so each entity is converted and stored once.
+    """
+
+    def __init__(self):
+        self._tables = {}
+        self._lock = Lock()
+
+    def __contains__(self, item):
+        table, key = item
+        with self._lock:
+            return key in self._tables.get(table, {})
+
+    def add(self, table, key, row=None):
+        """Store the row of the key in the table. Returns True only for the first caller."""
+        with self._lock:
+            keys = self._tables.setdefault(table, {})
+            if key in keys:
+                return False
+            keys[key] = row
+            return True
+
+    def update(self, table, key, row):
+        with self._lock:
+            self._tables.setdefault(table, {})[key] = row
+
+    def rows(self, table):
+        with self._lock:
+            return [row for row in self._tables.get(table, {}).values() if row is not None]
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+class RowBuffer(object):
+    """Per-thread row buffers of a converter, merged once on read.
+
+    Every thread appends to its own lists, so a single converter can be shared by any number of workers
+    without contention or lost rows. Only the first append of a thread takes the lock, to register its buffer.
+    """
+
+    def __init__(self):
+        self._local = local()
+        self._buffers = []
+        self._lock = Lock()
+
+    def _tables(self):
+        try:
+            return self._local.tables
+        except AttributeError:
+            tables = {}
+            with self._lock:
+                self._buffers.append(tables)
+            self._local.tables = tables
+            return tables
+
+    def append(self, table, row):
+        tables = self._tables()
+        if table not in tables:
+            tables[table] = []
+        tables[table].append(row)
+
+    def extend(self, table, rows):
+        tables = self._tables()
+        if table not in tables:
+            tables[table] = []
+        tables[table].extend(rows)
+
+    def rows(self, table):
+        """Merge the rows of the table from every thread. The workers are expected to be done by now."""
+        with self._lock:
+            buffers = list(self._buffers)
+        rows = []
+        for tables in buffers:
+            rows.extend(tables.get(table, []))
+        return rows
+
+    def pop(self, table):
+        """Merge and remove the rows of the table from every thread."""
+        with self._lock:
+            buffers = list(self._buffers)
+        rows = []
+        for tables in buffers:
+            rows.extend(tables.pop(table, []))
+        return rows
+
+    def pop_local(self, table):
+        """Remove and return the rows of the table appended by the calling thread."""
+        return self._tables().pop(table, [])
+
+    def clear(self):
+        with self._lock:
+            for tables in self._buffers:
+                tables.clear()
+
+
+def dimension(table, key):
+    """Skip the decorated converter method if the entity was already converted in this run.
+
+    :param table: name of the dimension table in the converter cache
+    :param key: function which returns the identity of the entity from the method arguments
+    """
+    def deco_dimension(f):
+
+        @wraps(f)
+        def f_dimension(self, *args, **kwargs):
+            k = key(*args, **kwargs)
+            # An entity without identity, e.g. a match without referee, has no dimension row
+            if k is None or (table, k) in self._cache:
+                return None
+            row = f(self, *args, **kwargs)
+            # The row is published only when it is complete, so a concurrent get() never sees the key without it.
+            # Converters which keep the rows in memory return them, so the run can share a single copy.
+            return row if self._cache.add(table, k, row) else None
+
+        return f_dimension
+
+    return deco_dimension
+
 
 class DriverPool(mpq.Queue, metaclass=Singleton):
 
@@ -26,10 +26,16 @@ else:
             conn_config = kwargs.pop('config', {})
             conn = kwargs.pop('connection', ConnectionPool(config=conn_config))
             self._q = kwargs.get('queue', InsertQueue(pool=conn, **kwargs))
+            self._result = None
             super(SqlConverter, self).__init__(*args, **kwargs)
 
+        def flush(self):
+            self._result = self._q.fire_workers()
+
         def get(self):
-            return pd.DataFrame(self._q.fire_workers())
+            # Finalize once, the queue is fired only by the first call
+            self.close()
+            return pd.DataFrame(self._result)
 
 
         def update_player_birthday(self, player_id, birthday):
@@ -75,6 +81,21 @@ else:
                     ).set(tables.players_stats.has_fifa_stat, has_fifa_stat
                     ).where((tables.players_stats.sc_player_id == player_id) & (tables.players_stats.match_id == match_id))))
 
+        def update_fifa_stat_range(self, player_id, start_date, end_date, fifa_stat, match_ids=()):
+            """
+            UPDATE players_stats
+            SET fifa_stat = '{...}', has_fifa_stat = true
+            WHERE sc_player_id = 2867 AND match_id IN (
+                SELECT match_id FROM matches WHERE match_date > '2019-09-19' AND match_date < '2020-01-30');
+            """
+            has_fifa_stat = True if fifa_stat is not None else False
+            matches = Query.from_(tables.matches).select(tables.matches.match_id).where(
+                (tables.matches.match_date > start_date) & (tables.matches.match_date < end_date))
+            self._q.put(str(PostgreSQLQuery.update(tables.players_stats
+                    ).set(tables.players_stats.fifa_stat, JSON(fifa_stat) if fifa_stat is not None else None
+                    ).set(tables.players_stats.has_fifa_stat, has_fifa_stat
+                    ).where((tables.players_stats.sc_player_id == player_id) & tables.players_stats.match_id.isin(matches))))
+
         def update_has_fifa_stat(self, player_id, value=False):
             """
             UPDATE player_stats
@@ -83,4 +104,100 @@ else:
             """
             self._q.put(str(PostgreSQLQuery.update(tables.players_stats
                    ).set(tables.players_stats.has_fifa_stat, value
-                   ).where(tables.players_stats.sc_player_id == player_id)))
\ No newline at end of file
+                   ).where(tables.players_stats.sc_player_id == player_id)))
+
+
+try:
+    # Pip package imports
+    from pypika import Query, Table, Parameter, functions as fn
+    from pypika.dialects import PostgreSQLQuery
+
+    # Internal package imports
+    from miner.sql import BulkInsert, TableUpdate, SqliteWriter, connect_sqlite, DEFAULT_BATCH_SIZE, \
+        DEFAULT_DATABASE, SQL_TABLES, PLAYERS_TABLE, PLAYERS_STATS_TABLE
+
+except ImportError as err:
+    logger.warning(err)
+else:
+    BIRTHDAY_UPDATE = TableUpdate(PLAYERS_TABLE, ['birth_date'])
+    FIFA_ID_UPDATE = TableUpdate(PLAYERS_TABLE, ['fifa_player_id'])
+    FIFA_STAT_UPDATE = TableUpdate(PLAYERS_STATS_TABLE, ['fifa_stat', 'has_fifa_stat'])
+    HAS_FIFA_STAT_UPDATE = TableUpdate(PLAYERS_STATS_TABLE, ['has_fifa_stat'], key=['sc_player_id'])
+
+    class MatchRangeUpdate(TableUpdate):
+        """Update of the rows of a player, whose match was played in the (start, end) date interval.
+        The rows are (values of the columns..., sc_player_id, start date, end date).
+        """
+
+        def __init__(self, schema, columns):
+            super(MatchRangeUpdate, self).__init__(schema, columns, key=['sc_player_id'])
+            self.name += ' by match date'
+
+        def update_sql(self, paramstyle='%s', query=PostgreSQLQuery):
+            try:
+                return self._templates[(paramstyle, query)]
+            except KeyError:
+                matches = Table('matches')
+                # The stored match dates may carry a time part, only the day is compared
+                match_ids = Query.from_(matches).select(matches.match_id).where(
+                    (fn.Date(matches.match_date) > Parameter(paramstyle)) &
+                    (fn.Date(matches.match_date) < Parameter(paramstyle)))
+                update = query.update(self.table)
+                for column in self.columns:
+                    update = update.set(column, Parameter(paramstyle))
+                template = str(update.where((self.table.sc_player_id == Parameter(paramstyle)) &
+                                            self.table.match_id.isin(match_ids)))
+                self._templates[(paramstyle, query)] = template
+                return template
+
+        statement = update_sql
+
+    FIFA_STAT_RANGE_UPDATE = MatchRangeUpdate(PLAYERS_STATS_TABLE, ['fifa_stat', 'has_fifa_stat'])
+
+    class SqliteConverter(Converter):
+        """Update the players of the embedded SQLite database written by the sofascore SqliteConverter.
+        The updates are collected and written in batches with executemany(), the result is the path of the database.
+        """
+
+        def __init__(self, *args, **kwargs):
+            database = kwargs.pop('database', DEFAULT_DATABASE)
+            connection = kwargs.pop('connection', None)
+            batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+            # Only the connection opened by the converter is closed by it
+            self._own_conn = connection is None
+            self._conn = connection if connection is not None else connect_sqlite(database, SQL_TABLES)
+            # The player wide has_fifa_stat flags are written before the stats of the matches
+            self._bulk = BulkInsert(SqliteWriter(self._conn), batch_size=batch_size,
+                                    tables=[BIRTHDAY_UPDATE, FIFA_ID_UPDATE, HAS_FIFA_STAT_UPDATE, FIFA_STAT_UPDATE,
+                                            FIFA_STAT_RANGE_UPDATE])
+            self._result = database
+            super(SqliteConverter, self).__init__(*args, **kwargs)
+
+        def flush(self):
+            self._bulk.flush()
+
+        def close(self):
+            super(SqliteConverter, self).close()
+            if self._own_conn:
+                self._conn.close()
+
+        def get(self):
+            self.close()
+            return self._result
+
+        def update_player_birthday(self, player_id, birthday):
+            self._bulk.add(BIRTHDAY_UPDATE, (birthday, player_id))
+
+        def update_fifa_id(self, player_id, fifa_id):
+            self._bulk.add(FIFA_ID_UPDATE, (fifa_id, player_id))
+
+        def update_fifa_stat(self, player_id, match_id, fifa_stat):
+            has_fifa_stat = True if fifa_stat is not None else False
+            self._bulk.add(FIFA_STAT_UPDATE, (fifa_stat, has_fifa_stat, player_id, match_id))
+
+        def update_fifa_stat_range(self, player_id, start_date, end_date, fifa_stat, match_ids=()):
+            has_fifa_stat = True if fifa_stat is not None else False
+            self._bulk.add(FIFA_STAT_RANGE_UPDATE, (fifa_stat, has_fifa_stat, player_id, start_date, end_date))
+
+        def update_has_fifa_stat(self, player_id, value=False):
+            self._bulk.add(HAS_FIFA_STAT_UPDATE, (value, player_id))
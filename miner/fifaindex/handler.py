@@ -2,7 +2,7 @@
 
 import traceback
 import numpy as np
-from datetime import datetime
+from datetime import datetime, date
 from concurrent.futures import ThreadPoolExecutor as TPE
 from multiprocessing import cpu_count
 
@@ -64,6 +64,52 @@ class FifaHandler(IHandler):
                 pool = ConnectionPool()
                 return pool.sql_query(get_all_match_for_player_id(player_id))
 
+    class SqliteQuery(object):
+        """Read the players from the embedded SQLite database written by the sofascore SqliteConverter."""
+
+        NULL_FIFA_STATS = """
+            SELECT p.sc_player_id AS player_id, p.fifa_player_id AS fifa_id, p.birth_date AS birth,
+                   p.full_name AS name, p.short_name AS short
+            FROM players p
+            WHERE p.sc_player_id IN (
+                SELECT DISTINCT ps.sc_player_id FROM players_stats ps WHERE ps.fifa_stat IS NULL LIMIT ?)
+        """
+
+        ALL_MATCH_FOR_PLAYER_ID = """
+            SELECT m.match_id, DATE(m.match_date) AS date
+            FROM players_stats ps
+            JOIN matches m ON m.match_id = ps.match_id
+            WHERE ps.sc_player_id = ?
+            ORDER BY m.match_date DESC
+        """
+
+        def __init__(self, *args, **kwargs):
+            self._database = kwargs.get('database', None)
+
+        def get_null_fifa_stats(self, limit):
+            try:
+                from miner.sql import query_sqlite, DEFAULT_DATABASE
+            except ImportError as err:
+                logger.error(err)
+                return pd.DataFrame()
+            else:
+                # A negative limit is no limit in SQLite
+                df = query_sqlite(self._database or DEFAULT_DATABASE, self.NULL_FIFA_STATS,
+                                  (limit if limit is not None else -1,))
+                # The birth dates are compared as date objects by the scrappers
+                df['birth'] = [date.fromisoformat(birth[:10]) if birth is not None else None for birth in df['birth']]
+                return df
+
+        def get_all_match_for_player_id(self, player_id):
+            try:
+                from miner.sql import query_sqlite, DEFAULT_DATABASE
+            except ImportError as err:
+                logger.error(err)
+                return pd.DataFrame()
+            else:
+                return query_sqlite(self._database or DEFAULT_DATABASE, self.ALL_MATCH_FOR_PLAYER_ID,
+                                    (int(player_id),), parse_dates=['date'])
+
     name = "Fifa Stat Scrapper"
     slug = "fifa-stat-scrapper"
     version = "v0_1"
@@ -168,15 +214,16 @@ class FifaHandler(IHandler):
                 return pd.DataFrame(result, columns=['player_id', 'birth'])
             return fetch
 
-        q = self._converter(name="Birthday fetcher")
-        fnc = make_fetcher(q)
-        if self._get_config('multithreading'):
-            threads = self._get_config('num_of_threads')
-            splitted_id_list = split(id_list, threads)
-            with TPE(max_workers=threads) as pool:
-                df_list = list(pool.map(lambda x: fnc(x), splitted_id_list))
-        else:
-            df_list = [ fnc(id_list) ]
+        # The converter is flushed when the block is left
+        with self._converter(name="Birthday fetcher") as q:
+            fnc = make_fetcher(q)
+            if self._get_config('multithreading'):
+                threads = self._get_config('num_of_threads')
+                splitted_id_list = split(id_list, threads)
+                with TPE(max_workers=threads) as pool:
+                    df_list = list(pool.map(lambda x: fnc(x), splitted_id_list))
+            else:
+                df_list = [ fnc(id_list) ]
 
         return pd.concat(df_list)
 
@@ -208,21 +255,16 @@ class FifaHandler(IHandler):
                         if len(player_matches_df.index) > 0:
                             # Make sure the date's are in descending order
                             fifa_stats.sort(reverse=True, key=lambda x: x[0])
-                            # List of stats and IDs
-                            queue_list = []
                             # Initial first date
                             first_date = datetime.now().date()
                             for fifa_date, fifa_stat in fifa_stats:
                                 filtered_df = player_matches_df[ (player_matches_df['date'] < pd.Timestamp(first_date)) & (player_matches_df['date'] > pd.Timestamp(fifa_date))]
 
-                                match_ids = filtered_df['match_id'].tolist()
+                                # Every match of the interval gets the same stat, written once with a single update
+                                if len(filtered_df.index) > 0:
+                                    q.update_fifa_stat_range(player_id, fifa_date, first_date, fifa_stat,
+                                                             match_ids=filtered_df['match_id'].tolist())
                                 first_date = fifa_date
-                                if len(match_ids) > 0:
-                                    queue_list.append( (player_id, fifa_stat, match_ids) )
-
-                            for player_id, fifa_stat, match_ids in queue_list:
-                                for match_id in match_ids:
-                                    q.update_fifa_stat(player_id, match_id, fifa_stat)
                     else:
                         q.update_has_fifa_stat(player_id, False)
                     # Update the fifa index also
@@ -236,13 +278,13 @@ class FifaHandler(IHandler):
 
             return fetch
 
-        q = self._converter(name="FifaStat fetcher")
-        fnc = make_fetcher(q)
-        if self._get_config('multithreading'):
-            threads = self._get_config('num_of_threads')
-            with TPE(max_workers=threads) as pool:
-                pool.map(lambda x: fnc(x[0], x[1]), group_df)
-        else:
-            list(map(lambda x : fnc(x[0], x[1]), group_df))
-        return q.get()
+        with self._converter(name="FifaStat fetcher") as q:
+            fnc = make_fetcher(q)
+            if self._get_config('multithreading'):
+                threads = self._get_config('num_of_threads')
+                with TPE(max_workers=threads) as pool:
+                    pool.map(lambda x: fnc(x[0], x[1]), group_df)
+            else:
+                list(map(lambda x : fnc(x[0], x[1]), group_df))
+            return q.get()
         #return pd.concat(df_list)
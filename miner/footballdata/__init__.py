@@ -1,3 +1,4 @@
 from .converters import *
 from .handler import *
-from .scrapper import *
\ No newline at end of file
+from .scrapper import *
+from .teams import *
\ No newline at end of file
@@ -7,82 +7,156 @@ import pandas as pd
 from miner.utils import safe_cast, intersection
 from miner.core import Converter
 
-try:
-    # Pip package imports
-    from pypika import Query, Table, Field, enums, JSON
-    from pypika.dialects import PostgreSQLQuery
+# Columns of football-data stored in the fd_odds and fd_statistics columns
+ODDS_COLUMNS = ['B365H', 'B365D', 'B365A', 'BSH', 'BSD', 'BSA', 'BWH', 'BWD', 'BWA', 'GBH', 'GBD', 'GBA', 'IWH', 'IWD', 'IWA', 'LBH', 'LBD', 'LBA', 'PSH'and'PH', 'PSD'and'PD', 'PSA'and'PA', 'SOH', 'SOD', 'SOA', 'SBH', 'SBD', 'SBA', 'SJH', 'SJD', 'SJA', 'SYH', 'SYD', 'SYA', 'VCH', 'VCD', 'VCA', 'WHH', 'WHD', 'WHA', 'Bb1X2', 'BbMxH', 'BbAvH', 'BbMxD', 'BbAvD', 'BbMxA', 'BbAvA', 'MaxH', 'MaxD', 'MaxA', 'AvgH', 'AvgD', 'AvgA', 'BbOU', 'BbMx>2.5', 'BbAv>2.5', 'BbMx<2.5', 'BbAv<2.5', 'GB>2.5', 'GB<2.5', 'B365>2.5', 'B365<2.5', 'P>2.5', 'P<2.5', 'Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5', 'BbAH', 'BbAHh', 'AHh', 'BbMxAHH', 'BbAvAHH', 'BbMxAHA', 'BbAvAHA', 'GBAHH', 'GBAHA', 'GBAH', 'LBAHH', 'LBAHA', 'LBAH', 'B365AHH', 'B365AHA', 'B365AH', 'PAHH', 'PAHA', 'MaxAHH', 'MaxAHA', 'AvgAHH', 'AvgAHA',]
+STATISTIC_COLUMNS = ['HS', 'AS', 'HST', 'AST', 'HHW', 'AHW', 'HC', 'AC', 'HF', 'AF', 'HFKC', 'AFKC', 'HO', 'AO', 'HY', 'AY', 'HR', 'AR', 'HBP', 'ABP', 'Time', 'HTHG', 'HTAG']
+
+
+# Columns of counts, the other numeric columns are decimals
+COUNT_COLUMNS = [column for column in STATISTIC_COLUMNS if column != 'Time'] + ['Bb1X2', 'BbOU', 'BbAH']
+
+
+def _json_value(column, value):
+    # The numeric columns are parsed as float32, the values are converted back to the numbers of the file
+    if isinstance(value, float):
+        return int(value) if column in COUNT_COLUMNS else round(value, 4)
+    return value
+
+
+def _filter_columns(football_df, list_of_cols):
+    tempdict = {}
+    pd_cols = football_df.keys()
+
+    try:
+        filtered_df = football_df[intersection(list_of_cols, pd_cols)]
+        filtered_df = filtered_df.dropna(axis='columns')
+        records = filtered_df.to_dict(orient='records')
+        tempdict = {column: _json_value(column, value) for column, value in records[0].items()}
+    except Exception:
+        pass
+    return tempdict
+
+
+def match_odds(football_df):
+    """Return the fd_odds of the selected match, the odds columns which are present."""
+    return _filter_columns(football_df, ODDS_COLUMNS)
+
+
+def match_statistic(football_df):
+    """Return the (home_score, away_score, fd_statistics) of the selected match."""
+    home_score = safe_cast(football_df.iloc[0]['FTHG'], int)
+    away_score = safe_cast(football_df.iloc[0]['FTAG'], int)
+    return home_score, away_score, _filter_columns(football_df, STATISTIC_COLUMNS)
 
+
+try:
     # Internal package imports
-    from db_conn.query.sc_soccer import tables
-    from db_conn.queue import InsertQueue
-    from db_conn.connection.postgresql import ConnectionPool
+    from miner.sql import BulkInsert, TableUpdate, StatementWriter, SqliteWriter, connect_sqlite, DEFAULT_BATCH_SIZE, \
+        DEFAULT_DATABASE, SQL_TABLES, ODDS_TABLE, STATISTICS_TABLE
 
 except ImportError as err:
     logger.warning(err)
 else:
-    class SqlConverter(Converter):
+    # The updates of a league season are collected, and written with a few set-based statements
+    FD_ODDS_UPDATE = TableUpdate(ODDS_TABLE, ['fd_odds'], key=['match_id'])
+    FD_STATISTICS_UPDATE = TableUpdate(STATISTICS_TABLE, ['home_score', 'away_score', 'fd_statistics'])
+    FD_UPDATES = [FD_STATISTICS_UPDATE, FD_ODDS_UPDATE]
+
+    class SqliteConverter(Converter):
+        """Update the matches of the embedded SQLite database written by the sofascore SqliteConverter.
+        The updates are collected and written in batches with executemany(), the result is the path of the database.
+        """
 
         def __init__(self, *args, **kwargs):
-            conn_config = kwargs.pop('config', {})
-            conn = kwargs.pop('connection', ConnectionPool(config=conn_config))
-            self._q = kwargs.get('queue', InsertQueue(pool=conn, **kwargs))
-            super(SqlConverter, self).__init__(*args, **kwargs)
+            database = kwargs.pop('database', DEFAULT_DATABASE)
+            connection = kwargs.pop('connection', None)
+            batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+            # Only the connection opened by the converter is closed by it
+            self._own_conn = connection is None
+            self._conn = connection if connection is not None else connect_sqlite(database, SQL_TABLES)
+            self._bulk = BulkInsert(SqliteWriter(self._conn), batch_size=batch_size, tables=FD_UPDATES)
+            self._result = database
+            super(SqliteConverter, self).__init__(*args, **kwargs)
+
+        def flush(self):
+            self._bulk.flush()
+
+        def close(self):
+            super(SqliteConverter, self).close()
+            if self._own_conn:
+                self._conn.close()
 
         def get(self):
-            return self._q.fire_workers()
+            self.close()
+            return self._result
 
         def update_match_odds(self, match_id, football_df):
-            """
-            match_id INTEGER,
-            sc_odds JSON,
-            fd_odds JSON
-            """
-            tempdict = {}
-            list_of_cols = ['B365H', 'B365D', 'B365A', 'BSH', 'BSD', 'BSA', 'BWH', 'BWD', 'BWA', 'GBH', 'GBD', 'GBA', 'IWH', 'IWD', 'IWA', 'LBH', 'LBD', 'LBA', 'PSH'and'PH', 'PSD'and'PD', 'PSA'and'PA', 'SOH', 'SOD', 'SOA', 'SBH', 'SBD', 'SBA', 'SJH', 'SJD', 'SJA', 'SYH', 'SYD', 'SYA', 'VCH', 'VCD', 'VCA', 'WHH', 'WHD', 'WHA', 'Bb1X2', 'BbMxH', 'BbAvH', 'BbMxD', 'BbAvD', 'BbMxA', 'BbAvA', 'MaxH', 'MaxD', 'MaxA', 'AvgH', 'AvgD', 'AvgA', 'BbOU', 'BbMx>2.5', 'BbAv>2.5', 'BbMx<2.5', 'BbAv<2.5', 'GB>2.5', 'GB<2.5', 'B365>2.5', 'B365<2.5', 'P>2.5', 'P<2.5', 'Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5', 'BbAH', 'BbAHh', 'AHh', 'BbMxAHH', 'BbAvAHH', 'BbMxAHA', 'BbAvAHA', 'GBAHH', 'GBAHA', 'GBAH', 'LBAHH', 'LBAHA', 'LBAH', 'B365AHH', 'B365AHA', 'B365AH', 'PAHH', 'PAHA', 'MaxAHH', 'MaxAHA', 'AvgAHH', 'AvgAHA',]
-            pd_cols = football_df.keys()
-
-            try:
-                filtered_df = football_df[intersection(list_of_cols, pd_cols)]
-                filtered_df = filtered_df.dropna(axis='columns')
-                tempdict = filtered_df.to_dict(orient='records')
-                tempdict = tempdict[0]
-            except Exception:
-                pass
-
-            self._q.put(str(PostgreSQLQuery.update(tables.odds
-                      ).set(tables.odds.fd_odds, JSON(tempdict) if len(tempdict.keys()) > 0 else None
-                      ).where(tables.odds.match_id == match_id)))
+            tempdict = match_odds(football_df)
+            self._bulk.add(FD_ODDS_UPDATE, (tempdict if len(tempdict.keys()) > 0 else None, match_id))
 
         def update_match_statistic(self, match_id, football_df):
-            """
-            match_id INTEGER PRIMARY KEY,
-            sc_statistics JSON,
-            fd_statistics JSON,
-            sc_forms JSON,
-            sc_votes JSON,
-            sc_manager_duels JSON,
-            sc_h2h JSON,
-            home_score FLOAT,
-            away_score FLOAT,
-            """
-            tempdict = {}
-            list_of_cols = ['HS', 'AS', 'HST', 'AST', 'HHW', 'AHW', 'HC', 'AC', 'HF', 'AF', 'HFKC', 'AFKC', 'HO', 'AO', 'HY', 'AY', 'HR', 'AR', 'HBP', 'ABP', 'Time', 'HTHG', 'HTAG']
-            pd_cols = football_df.keys()
-
-            try:
-                filtered_df = football_df[intersection(list_of_cols, pd_cols)]
-                filtered_df = filtered_df.dropna(axis='columns')
-                tempdict = filtered_df.to_dict(orient='records')
-                tempdict = tempdict[0]
-            except Exception:
-                pass
-
-            home_score = safe_cast(football_df.iloc[0]['FTHG'], int)
-            away_score = safe_cast(football_df.iloc[0]['FTAG'], int)
-
-            self._q.put(str(PostgreSQLQuery.update(tables.statistics
-                    ).set(tables.statistics.home_score, home_score
-                    ).set(tables.statistics.away_score, away_score
-                    ).set(tables.statistics.fd_statistics, JSON(tempdict) if len(tempdict.keys()) > 0 else None
-                    ).where(tables.statistics.match_id == match_id)))
+            home_score, away_score, tempdict = match_statistic(football_df)
+            self._bulk.add(FD_STATISTICS_UPDATE, (
+                home_score,
+                away_score,
+                tempdict if len(tempdict.keys()) > 0 else None,
+                match_id))
+
+    try:
+        # Internal package imports
+        from db_conn.query.sc_soccer import tables
+        from db_conn.queue import InsertQueue
+        from db_conn.connection.postgresql import ConnectionPool
+
+    except ImportError as err:
+        logger.warning(err)
+    else:
+        class SqlConverter(Converter):
+
+            def __init__(self, *args, **kwargs):
+                conn_config = kwargs.pop('config', {})
+                conn = kwargs.pop('connection', ConnectionPool(config=conn_config))
+                batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+                self._q = kwargs.get('queue', InsertQueue(pool=conn, **kwargs))
+                # Every batch of updates is rendered into one UPDATE ... FROM (VALUES ...) statement
+                writer = StatementWriter(self._q.put, tables={'odds': tables.odds, 'statistics': tables.statistics})
+                self._bulk = BulkInsert(writer, batch_size=batch_size, tables=FD_UPDATES)
+                self._result = None
+                super(SqlConverter, self).__init__(*args, **kwargs)
+
+            def flush(self):
+                self._bulk.flush()
+                self._result = self._q.fire_workers()
+
+            def get(self):
+                # Finalize once, the queue is fired only by the first call
+                self.close()
+                return self._result
+
+            def update_match_odds(self, match_id, football_df):
+                """
+                match_id INTEGER,
+                sc_odds JSON,
+                fd_odds JSON
+                """
+                tempdict = match_odds(football_df)
+                self._bulk.add(FD_ODDS_UPDATE, (tempdict if len(tempdict.keys()) > 0 else None, match_id))
 
+            def update_match_statistic(self, match_id, football_df):
+                """
+                match_id INTEGER PRIMARY KEY,
+                sc_statistics JSON,
+                fd_statistics JSON,
+                sc_forms JSON,
+                sc_votes JSON,
+                sc_manager_duels JSON,
+                sc_h2h JSON,
+                home_score FLOAT,
+                away_score FLOAT,
+                """
+                home_score, away_score, tempdict = match_statistic(football_df)
+                self._bulk.add(FD_STATISTICS_UPDATE, (
+                    home_score,
+                    away_score,
+                    tempdict if len(tempdict.keys()) > 0 else None,
+                    match_id))
@@ -1,6 +1,6 @@
 # Common Python library imports
-import difflib
-from concurrent.futures import ThreadPoolExecutor as TPE
+import os
+from concurrent.futures import ThreadPoolExecutor as TPE, as_completed
 from multiprocessing import cpu_count
 
 # Pip package imports
@@ -9,7 +9,8 @@ from loguru import logger
 
 # Internal package imports
 from miner.core import IHandler, Converter
-from miner.footballdata.scrapper import FootballDataRequest
+from miner.footballdata.scrapper import FootballDataRequest, DEFAULT_CACHE_DIR
+from miner.footballdata.teams import TeamNameIndex
 
 __all__ = ["FootballDataHandler", "get_default_converter"]
 
@@ -47,6 +48,36 @@ class FootballDataHandler(IHandler):
                 pool = ConnectionPool()
                 return pool.sql_query(get_matches_where_odds_are_null(start_date, end_date))
 
+    class SqliteQuery(object):
+        """Read the matches from the embedded SQLite database written by the sofascore SqliteConverter."""
+
+        MATCHES_WHERE_ODDS_ARE_NULL = """
+            SELECT m.match_id AS id, DATE(m.match_date) AS date, tr.tournament_short AS tournament,
+                   s.season_year AS season, ht.team_short AS home_team_short, ht.team_name AS home_team,
+                   at.team_short AS away_team_short, at.team_name AS away_team
+            FROM matches m
+            JOIN tournaments tr ON tr.tournament_id = m.tournament_id
+            JOIN seasons s ON s.season_id = m.season_id
+            JOIN teams ht ON ht.team_id = m.home_team_id
+            JOIN teams at ON at.team_id = m.away_team_id
+            LEFT JOIN odds o ON o.match_id = m.match_id
+            WHERE o.fd_odds IS NULL AND DATE(m.match_date) BETWEEN ? AND ?
+            ORDER BY m.match_date
+        """
+
+        def __init__(self, *args, **kwargs):
+            self._database = kwargs.get('database', None)
+
+        def get_matches_where_odds_are_null(self, start_date, end_date):
+            try:
+                from miner.sql import query_sqlite, DEFAULT_DATABASE
+            except ImportError as err:
+                logger.error(err)
+                return pd.DataFrame()
+            else:
+                return query_sqlite(self._database or DEFAULT_DATABASE, self.MATCHES_WHERE_ODDS_ARE_NULL,
+                                    (start_date.isoformat(), end_date.isoformat()))
+
 
     name = "Football-Data Scrapper"
     slug = "football-data-scrapper"
@@ -69,7 +100,11 @@ class FootballDataHandler(IHandler):
             'Deportivo La Coruña': 'La Coruna',
         },
         'multithreading': False,
-        'num_of_threads': cpu_count()
+        'num_of_threads': cpu_count(),
+        # Directory of the downloaded CSV files and the resolved team names, None keeps them in memory only
+        'cache_dir': DEFAULT_CACHE_DIR,
+        # Minimum similarity of a Sofascore and a football-data team name
+        'name_similarity': 0.4,
     }
 
     def __init__(self, *args, **kwargs):
@@ -86,118 +121,123 @@ class FootballDataHandler(IHandler):
 
         self._query_executor = kwargs.get('query', FootballDataHandler.SqlQuery())
 
-        # Create the singleton Sofa requester
-        self._req = FootballDataRequest()
-
-    def _get_close_match(self, name, fd_name_list):
-        return difflib.get_close_matches(name, fd_name_list, cutoff=0.8)
-        #if len(result) == 0:
-            #pass
-            #logger.error("Team name: %s not found in list: %s" % (name, fd_name_list))
-        #return result
-
-    def _match_name(self, grp_data, football_df, key_var, curr_date):
-        selected_match = pd.DataFrame()
-
-        fd_home = football_df['HomeTeam'].to_list()
-        fd_away = football_df['AwayTeam'].to_list()
-
-        name_h = grp_data[key_var % 'home']
-        if name_h not in self._get_config('alias').keys():
-            result_h = self._get_close_match(name_h, fd_home)
-        else:
-            result_h = [self._get_config('alias')[name_h]]
-        # 0 or more than 1 result.
-        if len(result_h) != 1:
-            # Match the away team names
-            name_a = grp_data[key_var % 'away']
-            if name_a not in self._get_config('alias').keys():
-                result_a = self._get_close_match(name_a, fd_away)
-            else:
-                result_a = [self._get_config('alias')[name_a]]
-            # If 0 result found, log error and continue
-            if len(result_h) == 0 and len(result_a) == 0:
-                logger.warn("At date: %s No matched name for: \'%s\' with the possibilities: %s. All possibility that day [Home]: %s | [Away]: %s" % (
-                    curr_date, [name_h, name_a], (result_h + result_a), fd_home, fd_away))
-            elif len(result_a) == 1:
-                selected_match = football_df[(football_df['AwayTeam'] == result_a[0])]
-            else:
-                # Select the row, where home teams are partially match, but filter with away team correctly.
-                selected_match = football_df[((football_df['AwayTeam'] == result_a[0]) & (
-                    football_df['HomeTeam'].isin(result_h)))]
-        else:
-            # Filter with home team only
-            selected_match = football_df[football_df['HomeTeam'] == result_h[0]]
-        return selected_match
-
-    def _team_name_matcher(self, data, football_df, q, curr_date):
-        for row_index, grp_data in data.iterrows():
-            try:
-                selected_match = self._match_name(grp_data, football_df, "%s_team_short", curr_date)
-                if len(selected_match) == 0:
-                    selected_match = self._match_name(grp_data, football_df, "%s_team", curr_date)
-                if len(selected_match) == 0:
-                    continue
-                q.update_match_statistic(grp_data['id'], selected_match)
-                q.update_match_odds(grp_data['id'], selected_match)
-            except Exception as err:
-                logger.error(err)
+        # The requester of the handler, with the CSV cache of its cache_dir
+        self._req = FootballDataRequest(cache_dir=self._get_config('cache_dir'))
+        cache_dir = self._get_config('cache_dir')
+        self._teams = TeamNameIndex(path=os.path.join(cache_dir, 'team-names.json') if cache_dir is not None else None,
+                                    aliases=self._get_config('alias'), threshold=self._get_config('name_similarity'))
+
+    def _resolve_names(self, tr, df, football_df):
+        """Resolve the Sofascore team names of the league season to the football-data names."""
+        teams = list(zip(df['home_team_short'], df['home_team'])) + list(zip(df['away_team_short'], df['away_team']))
+        return self._teams.build(tr, teams, football_df['HomeTeam'].tolist() + football_df['AwayTeam'].tolist())
+
+    @staticmethod
+    def _join_matches(df, football_df, names):
+        """Join the matches of a season to the football-data rows on (date, home team, away team).
+
+        If one of the teams is not resolved, the match is joined on the date and the other team, a team plays
+        once a day. Ambiguous keys are not joined.
+
+        :return: the (match id, football-data row position) frame of the joined matches, and the unjoined matches
+        """
+        resolve = lambda side: df['%s_team_short' % side].map(names).fillna(df['%s_team' % side].map(names))
+        matches = pd.DataFrame({'id': df['id'].values, 'Date': df['date'].values,
+                                'HomeTeam': resolve('home').values, 'AwayTeam': resolve('away').values})
+        rows = football_df[['Date', 'HomeTeam', 'AwayTeam']].reset_index(drop=True)
+        rows['row'] = rows.index
+
+        joined = []
+        for keys in (['Date', 'HomeTeam', 'AwayTeam'], ['Date', 'HomeTeam'], ['Date', 'AwayTeam']):
+            right = rows.dropna(subset=keys).drop_duplicates(subset=keys, keep=False)[keys + ['row']]
+            result = matches.dropna(subset=keys)[['id'] + keys].merge(right, on=keys, how='inner')
+            joined.append(result[['id', 'row']])
+            matches = matches[~matches['id'].isin(result['id'])]
+        return pd.concat(joined, ignore_index=True), df[df['id'].isin(matches['id'])]
 
     def _fetch_date(self, curr_date, *args, **kwargs):
         pass
 
     def _process(self, input_tuple):
-        q = self._converter()
-        tr, season, df = input_tuple
+        with self._converter() as q:
+            return self._process_season(q, *input_tuple)
+
+    def _process_season(self, q, tr, season, df):
         football_df = self._req.parse_odds(tr, season)
+        if football_df is None:
+            # The CSV could not be downloaded, the matches are tried again by the next run
+            logger.warning("[%s %s] No football-data odds, %s matches are skipped." % (tr, season, len(df)))
+            return q.get()
 
-        # Convert Date object
+        # Convert Date object, the football-data dates are parsed by the requester
         df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-        try:
-            football_df['Date'] = pd.to_datetime(football_df['Date'], format='%d/%m/%Y')
-        except Exception:
-            football_df['Date'] = pd.to_datetime(football_df['Date'], format='%d/%m/%y')
-        #football_df['Date'] = football_df['Date'].dt.date
-
-        group_df = df.groupby(pd.Grouper(key='date', freq='1D'), group_keys=False)
-        for curr_date, group_data in group_df:
-            # Filter for dates
-            filrtered_df = football_df[football_df['Date'] == curr_date]
-            self._team_name_matcher(group_data, filrtered_df, q, curr_date)
+
+        names = self._resolve_names(tr, df, football_df)
+        joined, unjoined = self._join_matches(df, football_df, names)
+        for match_id, row in zip(joined['id'], joined['row']):
+            try:
+                selected_match = football_df.iloc[[row]]
+                q.update_match_statistic(match_id, selected_match)
+                q.update_match_odds(match_id, selected_match)
+            except Exception as err:
+                logger.error(err)
+        if len(unjoined) > 0:
+            logger.warning("[%s %s] %s of %s matches are not matched: %s" % (
+                tr, season, len(unjoined), len(df), ["%s %s - %s" % (d.date(), home, away) for d, home, away in
+                                                     zip(unjoined['date'], unjoined['home_team'], unjoined['away_team'])]))
+
+        # The names which matched are looked up directly by the next runs
+        teams = df.set_index('id').loc[joined['id']]
+        fd_teams = football_df.iloc[joined['row']]
+        pairs = []
+        for side, fd_column in (('home', 'HomeTeam'), ('away', 'AwayTeam')):
+            for short, full, fd_team in zip(teams['%s_team_short' % side], teams['%s_team' % side], fd_teams[fd_column]):
+                pairs.extend((name, fd_team) for name in (short, full) if names.get(name) == fd_team)
+        self._teams.confirm(tr, pairs)
         return q.get()
 
-    def _do_fetch(self, start_date, end_date, *args, **kwargs):
+    @staticmethod
+    def _plan(query_df):
+        """Split the queried matches into (league, season, matches) work units. Only the non-empty ones are built."""
+        return [(tr, season, df.copy()) for (tr, season), df in query_df.groupby(['tournament', 'season'], sort=False)]
+
+    def _run(self, units):
+        """Process the work units, and yield the converter output of each unit as it finishes."""
+        if not self._get_config('multithreading') or len(units) < 2:
+            for tr, season, df in units:
+                try:
+                    yield self._process((tr, season, df))
+                except Exception as err:
+                    logger.error("[%s %s] %s" % (tr, season, err))
+            return
+        # The units are bound by the CSV parsing and the matching, more workers than units are not started
+        with TPE(max_workers=min(self._get_config('num_of_threads'), len(units))) as worker_pool:
+            futures = {worker_pool.submit(self._process, unit): unit for unit in units}
+            for future in as_completed(futures):
+                tr, season, _ = futures[future]
+                try:
+                    yield future.result()
+                except Exception as err:
+                    logger.error("[%s %s] %s" % (tr, season, err))
+
+    def iter_fetch(self, *args, **kwargs):
+        """Like fetch_dates(), but yield the converter output of every league season as soon as it is processed."""
+        start, end = self._date_range(**kwargs)
+        return self._iter_fetch(start, end)
+
+    def _iter_fetch(self, start_date, end_date):
         # Get the database query as dataframe
         query_df = self._query_executor.get_matches_where_odds_are_null(start_date, end_date)
-        seasons = query_df['season'].unique()
-        tournaments = query_df['tournament'].unique()
-
-        if self._get_config('multithreading'):
-            # Multithreading
-            param_list = []
-            # For loop one thread
-            for tr in tournaments:
-                # Filter for the tournament
-                filtered_df = query_df[(query_df['tournament'] == tr)]
-                for season in seasons:
-                    # Filter for the season
-                    season_filtered_df = filtered_df[ (filtered_df['season'] == season) ]
-                    param_list.append( tuple( [tr, season, season_filtered_df]) )
-
-            # player_id_gen = split_into(player_ids, cpu_count() * 5)
-            with TPE(max_workers=self._get_config('num_of_threads')) as worker_pool:
-                res_list = worker_pool.map(lambda x: self._process(x), param_list)
-                return pd.concat(res_list)
-
-        else:
-            # For loop one thread
-            res_list = []
-            for tr in tournaments:
-                # Filter for the tournament
-                filtered_df = query_df[(query_df['tournament'] == tr)]
-                for season in seasons:
-                    # Filter for the season
-                    filtered_df = filtered_df[ (filtered_df['season'] == season) ]
-                    res_list.append(self._process( tuple([ tr, season, filtered_df ])))
+        # The frames of the previous run are loaded again, the current season is revalidated
+        self._req.reset()
+        if len(query_df.index) == 0:
+            return
+        for res in self._run(self._plan(query_df)):
+            if res is not None:
+                yield res
 
+    def _do_fetch(self, start_date, end_date, *args, **kwargs):
+        res_list = list(self._iter_fetch(start_date, end_date))
+        if len(res_list) > 0 and all(isinstance(res, pd.DataFrame) for res in res_list):
             return pd.concat(res_list)
+        return res_list
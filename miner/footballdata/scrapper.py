@@ -1,18 +1,72 @@
 # Common Python library imports
-from io import StringIO
+import os
+from io import BytesIO
+from datetime import date
+from threading import Lock
 
 # Pip package imports
 from loguru import logger
 import requests
+import numpy as np
 import pandas as pd
-from requests.exceptions import Timeout, HTTPError
+from requests.exceptions import Timeout, HTTPError, RequestException
 
 # Internal package imports
-from miner.utils import Singleton, retry
+from miner.utils import retry
+from miner.footballdata.converters import ODDS_COLUMNS, STATISTIC_COLUMNS
 
 __all__ = ["FootballDataRequest"]
 
-class FootballDataRequest(metaclass=Singleton):
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'miner', 'football-data')
+# Version of the cached frames, the files of an other version are downloaded again
+CACHE_VERSION = 2
+
+# Only the columns used by the converters are parsed, the numbers as float32
+TEXT_COLUMNS = ['Div', 'HomeTeam', 'AwayTeam', 'Time']
+CSV_COLUMNS = set(['Div', 'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'] + ODDS_COLUMNS + STATISTIC_COLUMNS)
+CSV_DTYPES = {column: str if column in TEXT_COLUMNS else np.float32 for column in CSV_COLUMNS if column != 'Date'}
+
+
+def _last_row(content):
+    # The last line of the file, with its line break
+    return content[content.rfind(b'\n', 0, len(content.rstrip(b'\r\n'))) + 1:]
+
+
+def parse_dates(values):
+    """Parse the football-data dates, the format is detected by the length of the year: 10/08/2018 or 10/08/18."""
+    values = values.astype(object).where(values.notnull(), None)
+    long_year = values.str.len() > 8
+    dates = pd.to_datetime(values.where(long_year), format='%d/%m/%Y')
+    return dates.where(long_year, pd.to_datetime(values.where(~long_year), format='%d/%m/%y'))
+
+
+def read_csv(content, encoding=None):
+    """Parse a football-data CSV from the downloaded bytes. Only the columns used by the converters are loaded,
+    the numbers as float32 and the dates as datetimes.
+    """
+    read = lambda dtype: pd.read_csv(BytesIO(content), encoding=encoding, usecols=lambda column: column in CSV_COLUMNS,
+                                     dtype=dtype)
+    try:
+        df = read(CSV_DTYPES)
+    except ValueError:
+        # A malformed number in the file, the numbers which can not be parsed are missing
+        df = read({column: str for column in CSV_DTYPES})
+        for column in df.columns.intersection(list(CSV_DTYPES)):
+            if CSV_DTYPES[column] is not str:
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype(np.float32)
+    if 'Date' in df.columns:
+        df['Date'] = parse_dates(df['Date'])
+    return df
+
+
+class FootballDataRequest(object):
+    """Download the football-data CSV of a league season.
+
+    Every CSV is downloaded and parsed once per run, and the parsed frame is pickled to the cache_dir. The files of
+    the finished seasons never change, they are read from the cache only. The file of the current season only grows
+    by appended rows: it is synced with a Range request from its last known row, and only the new rows are parsed.
+    cache_dir=None keeps the frames in memory only. Every handler owns its requester, and resets it for every run.
+    """
 
     urls = {
         "premier-league" : "http://www.football-data.co.uk/mmz4281/{year}/E0.csv",
@@ -21,22 +75,160 @@ class FootballDataRequest(metaclass=Singleton):
         "serie-a" : "http://www.football-data.co.uk/mmz4281/{year}/I1.csv",
         "ligue-1" : "http://www.football-data.co.uk/mmz4281/{year}/F1.csv"}
 
-    def __init__(self):
-        pass
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self._cache_dir = cache_dir
+        self._frames = {}
+        self._locks = {}
+        self._lock = Lock()
+
+    def reset(self):
+        """Forget the frames of the previous run, so the current season is revalidated by the next one."""
+        with self._lock:
+            self._frames = {}
+            self._locks = {}
 
     def _convert_year(self, sofa_year):
         return sofa_year.replace('/', '')
 
-    @retry(Timeout, tries=4, delay=2)
-    def get(irl, url):
+    @staticmethod
+    def is_current_season(year, today=None):
+        """The seasons start in the summer, e.g. '19/20' is the current season from July 2019 to June 2020."""
+        today = today if today is not None else date.today()
+        current = today.year if today.month >= 7 else today.year - 1
+        yy = int(year.split('/')[0])
+        # The archive goes back to the 93/94 season
+        return (1900 if yy > 50 else 2000) + yy >= current
+
+    def parse_odds(self, tournament, year):
+        key = (tournament, self._convert_year(year))
+        # Only one worker loads a league season, the others wait for it
+        with self._lock:
+            lock = self._locks.setdefault(key, Lock())
+        with lock:
+            if key not in self._frames:
+                self._frames[key] = self._load(tournament, year)
+            frame = self._frames[key]
+        # The callers modify the frame
+        return frame.copy() if frame is not None else None
+
+    def _cache_path(self, tournament, year):
+        return os.path.join(self._cache_dir, '%s-%s.pkl' % (tournament, self._convert_year(year)))
+
+    def _load(self, tournament, year):
+        url = FootballDataRequest.urls[tournament].format(year=self._convert_year(year))
+        path = self._cache_path(tournament, year) if self._cache_dir is not None else None
+        cached = self._read_cache(path)
+        if cached is not None and not self.is_current_season(year):
+            return cached['frame']
+
+        headers = {}
+        if cached is not None and cached.get('etag') is not None:
+            headers['If-None-Match'] = cached['etag']
+        if cached is not None and cached.get('last_modified') is not None:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        if cached is not None and cached.get('length') is not None:
+            frame = self._sync(url, path, cached, headers)
+            if frame is not None:
+                return frame
+            # The file was rewritten, it is downloaded again
+            cached, headers = None, {}
+
         logger.info("Opening URL: \'%s\'." % url)
         try:
-            response = requests.get(url, timeout=(3,6))
-            response.raise_for_status()
+            response = self._request(url, headers)
+        except RequestException as err:
+            logger.warning(err)
+            response = None
+        if response is None:
+            # The request failed, or timed out every time
+            return cached['frame'] if cached is not None else None
+        if response.status_code == 304:
+            return cached['frame']
+        return self._store(path, response)
+
+    def _sync(self, url, path, cached, headers):
+        """Request the bytes from the last known row of the file, and append the new rows to the cached frame.
+        Returns None if the file has to be downloaded again.
+        """
+        last_row = cached['last_row']
+        start = cached['length'] - len(last_row)
+        logger.info("Syncing URL: \'%s\' from byte %s." % (url, start))
+        try:
+            # The byte offsets are of the file itself, a compressed response would not start with the last row
+            response = self._request(url, dict(headers, Range='bytes=%s-' % start, **{'Accept-Encoding': 'identity'}))
         except HTTPError as err:
+            # The file is shorter than the cached one
+            if err.response is not None and err.response.status_code == 416:
+                return None
+            logger.warning(err)
+            return cached['frame']
+        except RequestException as err:
+            logger.warning(err)
+            return cached['frame']
+        if response is None or response.status_code == 304:
+            # Timed out every time, or not modified
+            return cached['frame']
+        if response.status_code != 206:
+            # The Range header is not supported, the whole file is sent
+            return self._store(path, response)
+
+        content = response.content
+        # The response starts with the last known row, unless the file was rewritten
+        if not content.startswith(last_row):
             return None
-        return pd.read_csv(StringIO(response.text))
+        new_rows = content[len(last_row):]
+        frame = cached['frame']
+        if len(new_rows.strip()) > 0:
+            frame = pd.concat([frame, read_csv(cached['header'] + new_rows, cached['encoding'])],
+                              ignore_index=True, sort=False)
+        self._write_cache(path, {**cached,
+            'frame': frame,
+            'etag': response.headers.get('ETag', None),
+            'last_modified': response.headers.get('Last-Modified', None),
+            'length': cached['length'] + len(new_rows),
+            'last_row': _last_row(content)})
+        return frame
 
-    def parse_odds(self, tournament, year):
-        url = FootballDataRequest.urls[tournament].format(year=self._convert_year(year))
-        return self.get(url)
\ No newline at end of file
+    def _store(self, path, response):
+        """Parse the whole file, and cache it with the position of its last row."""
+        content = response.content
+        encoding = response.encoding or response.apparent_encoding
+        frame = read_csv(content, encoding)
+        self._write_cache(path, {
+            'version': CACHE_VERSION,
+            'frame': frame,
+            'etag': response.headers.get('ETag', None),
+            'last_modified': response.headers.get('Last-Modified', None),
+            'length': len(content),
+            'header': content[:content.find(b'\n') + 1],
+            'last_row': _last_row(content),
+            'encoding': encoding})
+        return frame
+
+    @retry(Timeout, tries=4, delay=2)
+    def _request(self, url, headers):
+        response = requests.get(url, headers=headers, timeout=(3,6))
+        response.raise_for_status()
+        return response
+
+    def _read_cache(self, path):
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            entry = pd.read_pickle(path)
+        except Exception as err:
+            logger.warning("Could not read the cached file \'%s\': %s" % (path, err))
+            return None
+        return entry if entry.get('version', None) == CACHE_VERSION else None
+
+    def _write_cache(self, path, entry):
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Replace the cached file at once, so an interrupted run never leaves a broken file behind
+            pd.to_pickle(entry, path + '.tmp')
+            os.replace(path + '.tmp', path)
+        except Exception as err:
+            logger.warning("Could not write the cached file \'%s\': %s" % (path, err))
@@ -0,0 +1,135 @@
+# Common Python library imports
+import os
+import re
+import json
+import unicodedata
+from threading import Lock
+
+# Pip package imports
+import numpy as np
+from loguru import logger
+
+__all__ = ["TeamNameIndex"]
+
+DEFAULT_THRESHOLD = 0.4
+
+
+def normalize_name(name):
+    """Lower case ASCII name without punctuation, e.g. '1. FC Köln' -> '1 fc koln'."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name.lower()).split())
+
+
+def _trigrams(name):
+    padded = '  %s ' % normalize_name(name)
+    return {padded[idx:idx + 3] for idx in range(len(padded) - 2)}
+
+
+def similarity_matrix(names, other_names):
+    """Cosine similarity of the character trigrams of every pair of names, as a len(names) x len(other_names) matrix."""
+    grams = [_trigrams(name) for name in names]
+    other_grams = [_trigrams(name) for name in other_names]
+    vocabulary = {gram: idx for idx, gram in enumerate(set().union(*grams, *other_grams))}
+
+    def vectors(gram_sets):
+        matrix = np.zeros((len(gram_sets), len(vocabulary)), dtype=np.float32)
+        for row, gram_set in enumerate(gram_sets):
+            matrix[row, [vocabulary[gram] for gram in gram_set]] = 1
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    return vectors(grams) @ vectors(other_grams).T
+
+
+class TeamNameIndex(object):
+    """Resolve the Sofascore team names to the football-data team names of a league.
+
+    The unknown teams of a season are resolved at once: every team is paired with the most similar football-data
+    name, by the trigram similarity of its short or full name, and each football-data name is given to one team
+    only. The confirmed pairs, the ones which matched a football-data row, are stored in the file at path, so the
+    later runs resolve them with a dictionary lookup.
+
+    :param path: JSON file of the confirmed names, None keeps them in memory only
+    :param aliases: fixed Sofascore name -> football-data name pairs, they are never looked up
+    :param threshold: the minimum similarity of a resolved pair
+    """
+
+    def __init__(self, path=None, aliases=None, threshold=DEFAULT_THRESHOLD):
+        self._path = path
+        self._aliases = dict(aliases) if aliases is not None else {}
+        self._threshold = threshold
+        self._lock = Lock()
+        self._confirmed = self._read()
+
+    def _read(self):
+        if self._path is None or not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as err:
+            logger.warning("Could not read the team names \'%s\': %s" % (self._path, err))
+            return {}
+
+    def _write(self):
+        if self._path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+            with open(self._path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._confirmed, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(self._path + '.tmp', self._path)
+        except Exception as err:
+            logger.warning("Could not write the team names \'%s\': %s" % (self._path, err))
+
+    def build(self, tournament, teams, fd_names):
+        """Resolve the teams of a league season.
+
+        :param tournament: the league
+        :param teams: list of the (short name, full name) pairs of the Sofascore teams
+        :param fd_names: the team names of the football-data season
+        :return: dictionary of both names of every resolved team -> football-data name
+        """
+        fd_names = sorted(set(name for name in fd_names if isinstance(name, str)))
+        with self._lock:
+            confirmed = dict(self._confirmed.get(tournament, {}))
+        known = lambda name: self._aliases.get(name, confirmed.get(name))
+        names = {}
+        unknown = []
+        for team in set(teams):
+            fd_name = next((known(name) for name in team if known(name) is not None), None)
+            if fd_name is not None:
+                names.update({name: fd_name for name in team})
+            else:
+                unknown.append(team)
+
+        # The football-data names of the known teams are not given to an other team
+        taken = set(names.values())
+        free = [name for name in fd_names if name not in taken]
+        if len(unknown) > 0 and len(free) > 0:
+            short = similarity_matrix([team[0] for team in unknown], free)
+            full = similarity_matrix([team[1] for team in unknown], free)
+            scores = np.maximum(short, full)
+            # The most similar pairs first
+            used_teams, used_names = set(), set()
+            for flat_idx in np.argsort(-scores, axis=None):
+                team_idx, name_idx = np.unravel_index(flat_idx, scores.shape)
+                if scores[team_idx, name_idx] < self._threshold:
+                    break
+                if team_idx in used_teams or name_idx in used_names:
+                    continue
+                used_teams.add(team_idx)
+                used_names.add(name_idx)
+                names.update({name: free[name_idx] for name in unknown[team_idx]})
+        return names
+
+    def confirm(self, tournament, pairs):
+        """Remember the (Sofascore name, football-data name) pairs which matched a football-data row."""
+        with self._lock:
+            confirmed = self._confirmed.setdefault(tournament, {})
+            new_pairs = {name: fd_name for name, fd_name in pairs
+                         if name not in self._aliases and confirmed.get(name) != fd_name}
+            if len(new_pairs) == 0:
+                return
+            confirmed.update(new_pairs)
+            self._write()
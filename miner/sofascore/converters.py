@@ -1,54 +1,514 @@
 # Common Python library imports
+import os
 import re
-from datetime import datetime
+import sys
+import shutil
+import tempfile
+from uuid import uuid4
+from threading import Lock, local
+from functools import lru_cache
 
 # Pip package imports
 from loguru import logger
+import numpy as np
 import pandas as pd
 
 # Internal package imports
-from miner.utils import get_nested, safe_cast, listify
-from miner.core import Converter
+from miner.utils import get_nested, safe_cast, Extractor, concat_frames
+from miner.core import Converter, dimension
+
+# Match timestamps are converted from UTC to this timezone, unless the converter is created with an other one
+DEFAULT_TIMEZONE = 'Europe/Budapest'
+DEFAULT_SPILL_PARTITIONS = 16
+
+# Table declarations: (column, path in the payload, cast, default)
+TOURNAMENT = Extractor([
+    ('tournament_id', ('tournament', 'uniqueId'), int),
+    ('tournament_name', ('tournament', 'name')),
+    ('tournament_short', ('tournament', 'slug')),
+])
+
+SEASON = Extractor([
+    ('season_id', ('id',), int),
+    ('season_year', ('year',)),
+    ('season_name', ('name',)),
+    ('season_slug', ('slug',)),
+])
+
+TEAM = Extractor([
+    ('team_id', ('id',), int),
+    ('team_name', ('name',)),
+    ('team_slug', ('slug',)),
+    ('team_short', ('shortName',)),
+])
+
+MATCH = Extractor([
+    ('match_id', ('event', 'id'), int),
+    ('season_id', ('event', 'season', 'id'), int),
+    ('match_date', ('event', 'formatedStartDate')),
+    # UTC start time, combined with the match date and converted to the local timezone in one pass
+    ('full_date', ('event', 'startTime')),
+    ('match_status', ('event', 'status', 'type')),
+    ('home_team_id', ('event', 'homeTeam', 'id'), int),
+    ('away_team_id', ('event', 'awayTeam', 'id'), int),
+    ('referee_id', ('event', 'referee', 'id'), int),
+    ('stadium_id', ('event', 'venue', 'id'), int),
+])
+
+REFEREE = Extractor([
+    ('referee_id', ('event', 'referee', 'id'), int),
+    ('referee_name', ('event', 'referee', 'name')),
+    ('yellow_card_per_game', ('event', 'referee', 'yellowCardsPerGame'), float),
+    ('red_card_per_game', ('event', 'referee', 'redCardsPerGame'), float),
+])
+
+MATCH_SCORE = Extractor([
+    ('match_id', ('event', 'id'), int),
+    ('home_score', ('event', 'homeScore', 'current'), float),
+    ('away_score', ('event', 'awayScore', 'current'), float),
+])
+
+VOTE = Extractor([
+    ('vote_home', ('vote1',), None, ""),
+    ('vote_away', ('vote2',), None, ""),
+    ('vote_draw', ('voteX',), None, ""),
+    ('vote_home_perc', ('vote1ScaledPercentage',), None, ""),
+    ('vote_away_perc', ('vote2ScaledPercentage',), None, ""),
+    ('vote_draw_perc', ('voteXScaledPercentage',), None, ""),
+])
+
+MANAGER_DUEL = Extractor([
+    ('manager_home_win', ('homeManagerWins',), None, ""),
+    ('manager_away_win', ('awayManagerWins',), None, ""),
+    ('manager_home', ('homeManager', 'id'), None, ""),
+    ('manager_away', ('awayManager', 'id'), None, ""),
+])
+
+H2H_DUEL = Extractor([
+    ('h2h_home', ('homewins',), None, ""),
+    ('h2h_away', ('awaywins',), None, ""),
+    ('h2h_draw', ('draws',), None, ""),
+])
+
+TEAM_LINEUP = Extractor([
+    ('formation', ('formation',)),
+    ('manager_id', ('manager', 'id'), int),
+])
+
+MANAGER = Extractor([
+    ('manager_id', ('manager', 'id'), int),
+    ('manager_name', ('manager', 'name')),
+])
+
+PLAYER_LINEUP = Extractor([
+    ('sc_player_id', ('player', 'id'), int),
+    ('player_position_long', ('positionName',)),
+    ('player_position_short', ('positionNameshort',)),
+    ('substitute', ('substitute',)),
+    ('sc_rating', ('rating',), float),
+])
+
+PLAYER = Extractor([
+    ('sc_player_id', ('id',), int),
+    ('full_name', ('name',)),
+    ('slug', ('slug',)),
+    ('short_name', ('shortName',)),
+])
+
+STADIUM = Extractor([
+    ('stadium_id', ('event', 'venue', 'id'), int),
+    ('country', ('event', 'venue', 'country', 'name')),
+    ('city', ('event', 'venue', 'city', 'name')),
+    ('name', ('event', 'venue', 'stadium', 'name')),
+    ('capacity', ('event', 'venue', 'stadium', 'capacity'), int),
+])
+
+
+def parse_match_statistics(statistics):
+    temp_dict = {}
+    try:
+        for period in statistics['periods']:
+            try:
+                prefix = period['period'].lower() + '_'
+
+                for group in period['groups']:
+                    try:
+                        for item in group['statisticsItems']:
+                            try:
+                                item_name = item['name'].lower().replace(' ', '_')
+                                temp_dict['%s_%s_home' % (prefix, item_name)] = item['home']
+                                temp_dict['%s_%s_away' % (prefix, item_name)] = item['away']
+                            except Exception:
+                                continue
+                    except Exception:
+                        continue
+            except Exception:
+                continue
+    except Exception:
+        pass
+    return temp_dict
+
+
+def parse_teams_form(form):
+    temp_dict = {}
+
+    def parse_form(team, name):
+        temp_dict = {}
+        temp_dict['%s_avg_rating' % name] = safe_cast(team['avgRating'], float, default="")
+        temp_dict['%s_position' % name] = safe_cast(team['position'], int, default="")
+        temp_dict['%s_points' % name] = safe_cast(team['points'], float, default="")
+        for idx, form in enumerate(team['form']):
+            temp_dict['%s_form_%s' % (name, idx)] = form
+        return temp_dict
+    try:
+        temp_dict = { **temp_dict, **parse_form(form['homeTeam'], 'home') }
+        temp_dict = {**temp_dict, **parse_form(form['awayTeam'], 'away')}
+    except Exception:
+        pass
+    return temp_dict
+
+
+def convert_match_dates(match_date, start_time, tz=DEFAULT_TIMEZONE):
+    """Parse the Sofascore date and start time columns in one vectorized pass.
+    The start time is given in UTC by Sofascore, the full date is returned converted to the timezone.
+    """
+    match_date = pd.Series(match_date, dtype=object)
+    start_time = pd.Series(start_time, dtype=object, index=match_date.index)
+    full_date = pd.to_datetime(match_date + ' ' + start_time, format='%d.%m.%Y. %H:%M', errors='coerce')
+    full_date = full_date.dt.tz_localize('UTC').dt.tz_convert(tz)
+    return pd.to_datetime(match_date, format='%d.%m.%Y.', errors='coerce'), full_date
+
+
+def _odds_choice_name(name):
+    # '1' -> 'home', 'X' -> 'draw', '2' -> 'away', '1X' -> 'home_draw'. Other names are kept.
+    replaced = []
+    for c in name:
+        if c == '1':
+            replaced.append('home')
+        elif c == '2':
+            replaced.append('away')
+        elif c.lower() == 'x':
+            replaced.append('draw')
+        else:
+            break
+    return '_'.join(replaced) if len(replaced) > 0 else name
+
+
+def _odds_columns():
+    columns = []
+    # Ordinary markets, prefixed with the market name
+    for market, choices in [('Full time', ['1', 'X', '2']), ('Double chance', ['1X', 'X2', '12']),
+                            ('1st half', ['1', 'X', '2']), ('Draw no bet', ['1', '2']),
+                            ('Both teams to score', ['Yes', 'No']), ('', ['1', 'X', '2'])]:
+        prefix = market.lower().replace(' ', '_')
+        columns.extend('%s_%s' % (prefix, _odds_choice_name(choice)) for choice in choices)
+    # Match goals, prefixed with the goal line
+    for line in range(0, 7):
+        columns.extend('%d_5_%s' % (line, choice) for choice in ['over', 'under'])
+    # Special markets, the first choice is the home, the second is the away odd
+    columns.extend(['asian_handicap_home', 'asian_handicap_away', 'first_team_to_score_home', 'first_team_to_score_away'])
+    return columns
+
+
+# Fixed column index of the odds matrix
+ODDS_COLUMNS = _odds_columns()
+ODDS_INDEX = {name: idx for idx, name in enumerate(ODDS_COLUMNS)}
+ODDS_ORDINARY_MARKETS = {'Full time', 'Double chance', '1st half', 'Draw no bet', 'Both teams to score', ''}
+
+
+@lru_cache(maxsize=4096)
+def fraction_to_decimal(fractional_value):
+    """Convert a fractional odd (like '6/4') to decimal. The same handful of fractions are repeated in every
+    market, so the conversions are cached.
+    """
+    try:
+        x1, x2 = fractional_value.split("/")
+        return (int(x1) / int(x2)) + 1
+    except Exception:
+        return 0
+
+
+@lru_cache(maxsize=None)
+def _odds_column(market, group, choice):
+    # Resolve a market choice to its column index, None if the choice is not part of the odds matrix
+    if market in ODDS_ORDINARY_MARKETS:
+        name = '%s_%s' % (market.lower().replace(' ', '_'), _odds_choice_name(choice))
+    elif market == 'Match goals':
+        name = '%s_%s' % (group.lower().replace('.', '_'), choice.lower())
+    else:
+        name = '%s_%s' % (market.lower().replace(' ', '_'), choice)
+    return ODDS_INDEX.get(name)
+
+
+def parse_match_odds(data_odds):
+    """Parse the Sofascore odds into a float32 row of the odds matrix. Missing odds are NaN."""
+    row = np.full(len(ODDS_COLUMNS), np.nan, dtype=np.float32)
+    try:
+        for odd in data_odds['markets']:
+            market = odd['marketName']
+            if market in ODDS_ORDINARY_MARKETS or market == 'Match goals':
+                group = odd.get('choiceGroup') or ''
+                for choice in odd['choices']:
+                    idx = _odds_column(market, group, choice['name'])
+                    if idx is not None:
+                        row[idx] = fraction_to_decimal(choice['fractionalValue'])
+            elif market in ('Asian handicap', 'First team to score'):
+                row[_odds_column(market, None, 'home')] = fraction_to_decimal(odd['choices'][0]['fractionalValue'])
+                row[_odds_column(market, None, 'away')] = fraction_to_decimal(odd['choices'][1]['fractionalValue'])
+            # Other markets are currently not supported. Skip them
+    except Exception:
+        pass
+    return row
+
+
+def odds_to_dict(row):
+    """Convert an odds matrix row back to a {column: decimal odd} dictionary, without the missing odds."""
+    return {ODDS_COLUMNS[idx]: round(float(row[idx]), 4) for idx in np.flatnonzero(~np.isnan(row))}
+
+
+# Player statistic schema: (group, column, item keys in priority order)
+PLAYER_STAT_SCHEMA = [
+    # Summary
+    ('summary', 'goalAssist', ['goalAssist']),
+    ('summary', 'goals', ['goals']),
+    ('summary', 'minutesPlayed', ['minutesPlayed']),
+    # Attack
+    ('attack', 'shotsBlocked', ['shotsBlocked']),
+    ('attack', 'shotsOffTarget', ['shotsOffTarget']),
+    ('attack', 'shotsOnTarget', ['shotsOnTarget']),
+    ('attack', 'totalContest', ['totalContest']),
+    # Defence
+    ('defence', 'challengeLost', ['challengeLost']),
+    ('defence', 'interceptionWon', ['interceptionWon', 'interceptionWin']),
+    ('defence', 'outfielderBlock', ['outfielderBlock']),
+    ('defence', 'totalClearance', ['totalClearance']),
+    ('defence', 'totalTackle', ['wonTackel', 'totalTackle']),
+    # Duels
+    ('duels', 'dispossessed', ['dispossessed']),
+    ('duels', 'fouls', ['fouls']),
+    ('duels', 'totalDuels', ['totalDuels', 'groundDuels']),
+    ('duels', 'wasFouled', ['wasFouled']),
+    # Passing
+    ('passing', 'accuratePass', ['accuratePass']),
+    ('passing', 'keyPass', ['keyPass']),
+    ('passing', 'totalCross', ['totalCross']),
+    ('passing', 'totalLongBalls', ['totalLongBalls']),
+    # Goalkeeper
+    ('goalkeeper', 'goodHighClaim', ['goodHighClaim']),
+    ('goalkeeper', 'punches', ['punches']),
+    ('goalkeeper', 'runsOut', ['runsOut']),
+    ('goalkeeper', 'saves', ['saves']),
+]
+
+PLAYER_STAT_COLUMNS = [column for _, column, _ in PLAYER_STAT_SCHEMA]
+# Columns which are present only for goalkeepers
+PLAYER_STAT_GOALKEEPER = [idx for idx, (group, _, _) in enumerate(PLAYER_STAT_SCHEMA) if group == 'goalkeeper']
+
+
+def _player_stat_items():
+    # Lookup table: group -> item key -> (column index, priority of the key)
+    items = {}
+    for idx, (group, _, keys) in enumerate(PLAYER_STAT_SCHEMA):
+        for priority, key in enumerate(keys):
+            items.setdefault(group, {})[key] = (idx, priority)
+    return items
+
+
+_PLAYER_STAT_ITEMS = _player_stat_items()
+_DIGITS = re.compile(r'\d+')
+
+
+def _parse_stat_value(name_val_pair):
+    if 'raw' in name_val_pair:
+        return safe_cast(name_val_pair['raw'], int)
+    # Like {'name': 'Accurate passes', 'value': '30 (88%)'}, the first number is the value
+    _, val = name_val_pair.values()
+    match = _DIGITS.search(val)
+    return int(match.group(0)) if match is not None else None
+
+
+def parse_player_stats(stat_info):
+    """Parse the Sofascore player statistic into a fixed width float32 record with the PLAYER_STAT_COLUMNS.
+    Each group is walked only once, missing statistics are NaN.
+    """
+    record = np.full(len(PLAYER_STAT_SCHEMA), np.nan, dtype=np.float32)
+    priorities = [len(PLAYER_STAT_SCHEMA)] * len(PLAYER_STAT_SCHEMA)
+    try:
+        groups = stat_info['groups']
+        for group, group_info in groups.items():
+            lookup = _PLAYER_STAT_ITEMS.get(group)
+            if lookup is None:
+                continue
+            for key, name_val_pair in group_info['items'].items():
+                target = lookup.get(key)
+                # The first key of the schema wins, when more than one is present
+                if target is None or target[1] >= priorities[target[0]]:
+                    continue
+                try:
+                    value = _parse_stat_value(name_val_pair)
+                except Exception:
+                    continue
+                if value is not None:
+                    record[target[0]] = value
+                    priorities[target[0]] = target[1]
+    except (KeyError, TypeError, AttributeError):
+        pass
+    return record
+
+
+def player_stats_to_dict(record):
+    """Convert a player statistic record to a dictionary. Missing statistics are "", the goalkeeper statistics
+    are left out for the field players. A record without any statistic is an empty dictionary.
+    """
+    if np.isnan(record).all():
+        return {}
+    goalkeeper = any(not np.isnan(record[idx]) for idx in PLAYER_STAT_GOALKEEPER)
+    return {column: int(value) if not np.isnan(value) else ""
+            for idx, (column, value) in enumerate(zip(PLAYER_STAT_COLUMNS, record))
+            if goalkeeper or idx not in PLAYER_STAT_GOALKEEPER}
+
+
+def _stack(records, width):
+    return np.vstack(records) if len(records) > 0 else np.empty((0, width), dtype=np.float32)
+
+
+def _approx_nbytes(obj):
+    # Rough size of the buffered rows, the containers and their direct items are counted
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_approx_nbytes(item) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(value) for value in obj.values())
+    return sys.getsizeof(obj)
+
+
+def _match_stats_chunk(events):
+    rows = []
+    for event_info in events:
+        rows.append(MATCH_SCORE.row(event_info) + (
+            # Parse the match statistics
+            parse_match_statistics(event_info['statistics']),
+            # Parse the team form
+            parse_teams_form(event_info['teamsForm']),
+            # Update votes
+            VOTE(event_info['vote']),
+            # Update manager duels
+            MANAGER_DUEL(event_info['managerDuel']),
+            # Update the h2h duels
+            H2H_DUEL(event_info['h2hDuel'])))
+    return rows
+
+
+def _odds_chunk(rows):
+    ids = [safe_cast(event_id, int) for event_id, _ in rows]
+    return ids, _stack([parse_match_odds(data_odds) for _, data_odds in rows], len(ODDS_COLUMNS))
+
+
+def _player_stats_chunk(rows):
+    ids = [(safe_cast(player_id, int), match_id) for match_id, player_id, _ in rows]
+    return ids, _stack([parse_player_stats(stat_info) for _, _, stat_info in rows], len(PLAYER_STAT_COLUMNS))
+
+
+CHUNK_CONVERTERS = {
+    'match_stats': _match_stats_chunk,
+    'odds': _odds_chunk,
+    'player_stats': _player_stats_chunk,
+}
+
+
+def convert_chunk(table, rows):
+    """Convert a list of raw payloads into a compact chunk of the table, which can be passed to Converter.put().
+
+    - match_stats: list of (match_id, home_score, away_score, statistics, form, votes, manager_duels, h2h_duels)
+    - odds: (match ids, float32 matrix of the ODDS_COLUMNS)
+    - player_stats: ((sc_player_id, match_id) pairs, float32 matrix of the PLAYER_STAT_COLUMNS)
+
+    It is a module level function of picklable arguments, so the conversion can run in a process pool.
+    """
+    return table, CHUNK_CONVERTERS[table](rows)
+
 
 try:
     # Pip package imports
-    from pypika import Query, Table, Field, enums, JSON
     from pypika.dialects import PostgreSQLQuery
 
     # Internal package imports
-    from db_conn.query.sc_soccer import tables
-    from db_conn.queue import InsertQueue
-    from db_conn.connection.postgresql import ConnectionPool
+    from miner.sql import BulkInsert, StatementWriter, SqliteWriter, BackgroundWriter, connect_sqlite, \
+        DEFAULT_BATCH_SIZE, DEFAULT_DATABASE, SQL_TABLES, TOURNAMENTS_TABLE, SEASONS_TABLE, TEAMS_TABLE, \
+        REFEREES_TABLE, STADIUMS_TABLE, MANAGERS_TABLE, PLAYERS_TABLE, MATCHES_TABLE, ODDS_TABLE, STATISTICS_TABLE, \
+        LINEUPS_TABLE, PLAYER_LINEUPS_TABLE, PLAYERS_STATS_TABLE
 
 except ImportError as err:
     logger.warning(err)
 else:
-    class SqlConverter(Converter):
+    class SqlBaseConverter(Converter):
+        """Convert the rows of the sc_soccer tables, and write them in batches with the writer of the converter.
+
+        With a queue_size the batches are written by a BackgroundWriter while the scraping goes on, and at most
+        queue_size batches wait for the database before the workers are blocked.
+
+        The dimension rows are deduplicated per converter, not with the DimensionCache of the run. A converter
+        writes the dimension rows its facts refer to itself, so a fact never reaches the database before them,
+        even if an other converter of the run converted the same entity first.
+        """
 
         def __init__(self, *args, **kwargs):
-            conn_config = kwargs.pop('config', {})
-            conn = kwargs.pop('connection', ConnectionPool(config=conn_config))
-            self._q = kwargs.get('queue', InsertQueue(pool=conn, **kwargs))
-            super(SqlConverter, self).__init__(*args, **kwargs)
+            # The cache of the run is not used, see above
+            kwargs.pop('cache', None)
+            cache = None
+            self._timezone = kwargs.pop('timezone', DEFAULT_TIMEZONE)
+            batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+            writer = kwargs.pop('writer', None)
+            self._queue_size = kwargs.pop('queue_size', None)
+            self._result = None
+            super(SqlBaseConverter, self).__init__(*args, cache=cache, **kwargs)
+            self._connect(**kwargs)
+            # The rows are written in batches of batch_size rows
+            writer = writer if writer is not None else self._make_writer()
+            self._background = None
+            if self._queue_size is not None:
+                self._background = BackgroundWriter(writer, maxsize=self._queue_size)
+            self._bulk = BulkInsert(self._background or writer, batch_size=batch_size, tables=SQL_TABLES)
+
+        def _connect(self, **kwargs):
+            """Open the database of the converter from the remaining keyword arguments."""
+            pass
+
+        def _make_writer(self):
+            raise NotImplementedError
+
+        def flush(self):
+            self._bulk.flush()
+
+        def close(self):
+            try:
+                super(SqlBaseConverter, self).close()
+            finally:
+                # The thread is stopped even when a batch failed
+                if self._background is not None:
+                    self._background.close()
 
         def get(self):
-            return self._q.fire_workers()
+            # Finalize once, the queue is fired only by the first call
+            self.close()
+            return self._result
 
+        def put(self, chunk):
+            """Write a chunk made by convert_chunk() to the queue."""
+            table, data = chunk
+            getattr(self, '_put_' + table)(data)
+
+        @dimension('tournaments', lambda tr: get_nested(tr, 'tournament', 'uniqueId'))
         def convert_tournaments(self, tr):
             """
             tournament_id INTEGER PRIMARY KEY,
             tournament_name VARCHAR(100),
             tournament_short VARCHAR(50)
             """
-            id = safe_cast(get_nested(tr, 'tournament', 'uniqueId'), int)
-            name = get_nested(tr,'tournament', 'name')
-            slug = get_nested(tr, 'tournament', 'slug')
-            # Create query
-            self._q.put(str(Query.into(tables.tournaments).insert(
-                id,
-                name,
-                slug)))
+            self._bulk.add(TOURNAMENTS_TABLE, TOURNAMENT.row(tr))
 
+        @dimension('seasons', lambda season: get_nested(season, 'id'))
         def convert_season(self, season):
             """
             season_id INTEGER PRIMARY KEY,
@@ -56,17 +516,9 @@ else:
             season_name VARCHAR(50),
             season_slug VARCHAR(50)
             """
-            name = get_nested(season, 'name')
-            id = get_nested(season, 'id')
-            slug = get_nested(season, 'slug')
-            year = get_nested(season, 'year')
-            # Create query
-            self._q.put(str(Query.into(tables.seasons).insert(
-                id,
-                year,
-                name,
-                slug)))
+            self._bulk.add(SEASONS_TABLE, SEASON.row(season))
 
+        @dimension('teams', lambda team: get_nested(team, 'id'))
         def convert_teams(self, team):
             """
             team_id INTEGER PRIMARY KEY,
@@ -74,16 +526,7 @@ else:
             team_slug VARCHAR(50),
             team_short VARCHAR(50)
             """
-            name = get_nested(team, 'name')
-            id = get_nested(team, 'id')
-            slug = get_nested(team, 'slug')
-            short = get_nested(team, 'shortName')
-            # Create query
-            self._q.put(str(Query.into(tables.teams).insert(
-                id,
-                name,
-                slug,
-                short)))
+            self._bulk.add(TEAMS_TABLE, TEAM.row(team))
 
 
         def convert_match(self, event_info, tr_id):
@@ -98,55 +541,24 @@ else:
             referee_id INTEGER,
             stadium_id INTEGER,
             """
-            id = get_nested(event_info, 'event', 'id')
-            season_id = get_nested(event_info, 'event', 'season', 'id')
-            formatted_date = get_nested(event_info, 'event', 'formatedStartDate')
-            formatted_full_date = get_nested(event_info, 'event', 'startTime')
-            try:
-                concat_str = formatted_date + ' ' + formatted_full_date
-                formatted_date = datetime.strptime((formatted_date), '%d.%m.%Y.')
-                #formatted_date = "%d-%02d-%02d" % (formatted_date.year, formatted_date.month, formatted_date.day)
-
-                formatted_full_date = datetime.strptime((concat_str), '%d.%m.%Y. %H:%M')
-                #formatted_full_date = "%d-%02d-%02d %02d:%02d" % (formatted_full_date.year, formatted_full_date.month, formatted_full_date.day, formatted_full_date.hour, formatted_full_date.minute)
-            except Exception as err:
-                formatted_full_date = None
-                formatted_date = None
-
-            try:
-                import pytz
-                from pytz import timezone
-
-                # This code snippet is taking the Sofascore Time informations which is defined in GMT+0
-                gmt0 = timezone('Etc/GMT+0')
-                gmt0_time = gmt0.localize(formatted_full_date)
-                # Getting the local timezone. (For us Budapest is enough) it is in GMT+1 or GMT+2 n the summer
-                local_tz = timezone('Europe/Budapest')
-                # Convert the Sofascore time infromation from GMT+0 to GMT+2
-                formatted_full_date = gmt0_time.astimezone(local_tz)
-
-            except ImportError as err:
-                logger.error("Please install pytz like: pip install pytz")
-
-            status = get_nested(event_info, 'event', 'status', 'type')
-            home_id = get_nested(event_info, 'event', 'homeTeam', 'id')
-            away_id = get_nested(event_info, 'event', 'awayTeam', 'id')
-            referre_id = get_nested(event_info, 'event', 'referee', 'id')
-            stadium_id = get_nested(event_info, 'event', 'venue', 'id')
-            # Create query
-            self._q.put(str(PostgreSQLQuery.into(tables.matches).insert(
-                id,
-                tr_id,
-                season_id,
-                formatted_date,
-                formatted_full_date,
-                status,
-                home_id,
-                away_id,
-                referre_id,
-                stadium_id)))
-
-
+            self.convert_matches([event_info], [tr_id])
+
+        def convert_matches(self, events, tr_ids=None):
+            """Convert a list of match events in one pass. The tournament ids default to the tournament of the events."""
+            if tr_ids is None:
+                tr_ids = [get_nested(event, 'event', 'tournament', 'uniqueId') for event in events]
+            names = ['tournament_id'] + MATCH.names
+            rows = [dict(zip(names, (tr_id,) + MATCH.row(event))) for event, tr_id in zip(events, tr_ids)]
+            # Convert every timestamp of the batch at once. Only the dates go through pandas, so the integer
+            # columns with missing values are kept as None instead of NaN floats.
+            match_date, full_date = convert_match_dates([row['match_date'] for row in rows],
+                                                        [row['full_date'] for row in rows], self._timezone)
+            for row, row_date, row_full_date in zip(rows, match_date.astype(object), full_date.astype(object)):
+                row['match_date'] = row_date if not pd.isnull(row_date) else None
+                row['full_date'] = row_full_date if not pd.isnull(row_full_date) else None
+            self._bulk.extend(MATCHES_TABLE, [tuple(row[column] for column in MATCHES_TABLE.columns) for row in rows])
+
+        @dimension('referees', lambda event_info: get_nested(event_info, 'event', 'referee', 'id'))
         def convert_referee(self, event_info):
             """
             referee_id INTEGER PRIMARY KEY,
@@ -154,18 +566,7 @@ else:
             yellow_card_per_game FLOAT,
             red_card_per_game FLOAT
             """
-            referre_id = get_nested(event_info, 'event', 'referee', 'id')
-            yellow_card = get_nested(event_info, 'event', 'referee', 'yellowCardsPerGame')
-            red_card = get_nested(event_info, 'event', 'referee', 'redCardsPerGame')
-            yellow_card = safe_cast(yellow_card, float)
-            red_card = safe_cast(red_card, float)
-            referre_name = get_nested(event_info, 'event', 'referee', 'name')
-            # Create query
-            self._q.put(str(Query.into(tables.referees).insert(
-                referre_id,
-                referre_name,
-                yellow_card,
-                red_card)))
+            self._bulk.add(REFEREES_TABLE, REFEREE.row(event_info))
 
 
         def convert_match_odds(self, event_id, data_odds):
@@ -174,71 +575,21 @@ else:
             sc_odds JSON,
             fd_odds JSON
             """
-            tempdict = {}
-
-            ord_markets = ['Full time', 'Double chance', '1st half', 'Draw no bet', 'Both teams to score', '']
-            special_markets = ['Match goals', 'Asian handicap', 'First team to score']
-
-            def replace_name(name):
-                replaced = ""
-                for c in name:
-                    if c == '1':
-                        replaced += 'home'
-                    elif c == '2':
-                        replaced += 'away'
-                    elif c.lower() == 'x':
-                        replaced += 'draw'
-                    else:
-                        break
-                    replaced += '_'
-                if len(replaced) > 0:
-                    return replaced[:-1]
-                else:
-                    return name
+            self.convert_match_odds_batch([(event_id, data_odds)])
 
-            def split_odds(fractional_velue):
-                try:
-                    x1, x2 = fractional_velue.split("/")
-                    decimal_value = (int(x1) / int(x2)) + 1
-                    return decimal_value
-                except Exception:
-                    return 0
-
-            odds = data_odds['markets']
-            try:
-                for odd in odds:
-                    # First check if the market is an ordnary type.
-                    if odd['marketName'] in ord_markets:
-                        prefix = odd['marketName'].lower().replace(' ', '_')
-                        for choice in odd['choices']:
-                            tempdict['%s_%s' % (prefix, replace_name(choice['name']))] = split_odds(choice['fractionalValue'])
-
-                    elif odd['marketName'] in special_markets:
-                        if odd['marketName'] == 'Match goals':
-                            prefix = odd['choiceGroup'].lower().replace('.', '_')
-                            for choice in odd['choices']:
-                                tempdict['%s_%s' % (prefix, choice['name'].lower())] = split_odds(choice['fractionalValue'])
-                        if odd['marketName'] == 'Asian handicap':
-                            prefix = odd['marketName'].lower().replace(' ', '_')
-                            tempdict['%s_home' % prefix] = split_odds(odd['choices'][0]['fractionalValue'])
-                            tempdict['%s_away' % prefix] = split_odds(odd['choices'][1]['fractionalValue'])
-                        if odd['marketName'] == 'First team to score':
-                            prefix = odd['marketName'].lower().replace(' ', '_')
-                            tempdict['%s_home' % prefix] = split_odds(odd['choices'][0]['fractionalValue'])
-                            tempdict['%s_away' % prefix] = split_odds(odd['choices'][1]['fractionalValue'])
-                    else:
-                        pass
-                        # Currently not supported. Skip it
-            except Exception:
-                pass
+        def convert_match_odds_batch(self, rows):
+            """Convert a list of (event_id, data_odds) pairs."""
+            self.put(convert_chunk('odds', rows))
 
-            id = event_id
+        def _put_odds(self, chunk):
+            ids, matrix = chunk
+            for event_id, row in zip(ids, matrix):
+                tempdict = odds_to_dict(row)
 
-            # Create query
-            self._q.put(str(PostgreSQLQuery.into(tables.odds).insert(
-                id,
-                JSON(tempdict) if len(tempdict.keys()) > 0 else None,
-                None)))
+                self._bulk.add(ODDS_TABLE, (
+                    event_id,
+                    tempdict if len(tempdict.keys()) > 0 else None,
+                    None))
 
 
         def convert_match_statistic(self, event_info):
@@ -253,118 +604,24 @@ else:
             home_score FLOAT,
             away_score FLOAT,
             """
-
-            def parse_statistics(statistics):
-                temp_dict = {}
-                try:
-                    for period in statistics['periods']:
-                        try:
-                            prefix = period['period'].lower() + '_'
-
-                            for group in period['groups']:
-                                try:
-                                    for item in group['statisticsItems']:
-                                        try:
-                                            item_name = item['name'].lower().replace(' ', '_')
-                                            temp_dict['%s_%s_home' % (prefix, item_name)] = item['home']
-                                            temp_dict['%s_%s_away' % (prefix, item_name)] = item['away']
-                                        except Exception:
-                                            continue
-                                except Exception:
-                                    continue
-                        except Exception:
-                            continue
-                except Exception:
-                    pass
-                return temp_dict
-
-            def parse_teams_form(form):
-                temp_dict = {}
-
-                def parse_form(team, name):
-                    temp_dict = {}
-                    temp_dict['%s_avg_rating' % name] = safe_cast(team['avgRating'], float, default="")
-                    temp_dict['%s_position' % name] = safe_cast(team['position'], int, default="")
-                    temp_dict['%s_points' % name] = safe_cast(team['points'], float, default="")
-                    for idx, form in enumerate(team['form']):
-                        temp_dict['%s_form_%s' % (name, idx)] = form
-                    return temp_dict
-                try:
-                    temp_dict = { **temp_dict, **parse_form(form['homeTeam'], 'home') }
-                    temp_dict = {**temp_dict, **parse_form(form['awayTeam'], 'away')}
-                except Exception:
-                    pass
-                return temp_dict
-
-            def convert_vote(votes):
-                dataframe_dict = {}
-                # Get the votes
-                try:
-                    dataframe_dict['vote_home'] = get_nested(votes, 'vote1', default="")
-                    dataframe_dict['vote_away'] = get_nested(votes, 'vote2', default="")
-                    dataframe_dict['vote_draw'] = get_nested(votes, 'voteX', default="")
-                    dataframe_dict['vote_home_perc'] = get_nested(votes, 'vote1ScaledPercentage', default="")
-                    dataframe_dict['vote_away_perc'] = get_nested(votes, 'vote2ScaledPercentage', default="")
-                    dataframe_dict['vote_draw_perc'] = get_nested(votes, 'voteXScaledPercentage', default="")
-                except Exception:
-                    pass
-
-                return dataframe_dict
-
-            def convert_managerduel(manager_duels):
-                dataframe_dict = {}
-                try:
-                    # Get manager duels
-                    dataframe_dict['manager_home_win'] = get_nested(manager_duels, 'homeManagerWins', default="")
-                    dataframe_dict['manager_away_win'] = get_nested(manager_duels, 'awayManagerWins', default="")
-                    dataframe_dict['manager_home'] = get_nested(manager_duels, 'homeManager', 'id', default="")
-                    dataframe_dict['manager_away'] = get_nested(manager_duels, 'awayManager', 'id', default="")
-                except Exception:
-                    pass
-
-                return dataframe_dict
-
-            def convert_h2hduels(h2h_duels):
-                dataframe_dict = {}
-                try:
-                    # Get h2h
-                    dataframe_dict['h2h_home'] = get_nested(h2h_duels, 'homewins', default="")
-                    dataframe_dict['h2h_away'] = get_nested(h2h_duels, 'awaywins', default="")
-                    dataframe_dict['h2h_draw'] = get_nested(h2h_duels, 'draws', default="")
-                except Exception:
-                    pass
-
-                return dataframe_dict
-
-
-            id = get_nested(event_info, 'event', 'id')
-            home_score = get_nested(event_info, 'event', 'homeScore', 'current', default="")
-            away_score = get_nested(event_info, 'event', 'awayScore', 'current', default="")
-            home_score = safe_cast(home_score, float)
-            away_score = safe_cast(away_score, float)
-            # Parse the match statistics
-            statistics = parse_statistics(event_info['statistics'])
-            # Parse the team form
-            form = parse_teams_form(event_info['teamsForm'])
-            # Update votes
-            votes = convert_vote(event_info['vote'])
-            # Update manager duels
-            manager_duels = convert_managerduel(event_info['managerDuel'])
-            # Update the h2h duels
-            h2h_duels = convert_h2hduels(event_info['h2hDuel'])
-
-
-            # Create query
-            self._q.put(str(PostgreSQLQuery.into(tables.statistics).insert(
-                id,
-                JSON(statistics) if len(statistics.keys()) > 0 else None,
-                None,
-                JSON(form) if len(form.keys()) > 0 else None,
-                JSON(votes) if len(votes.keys()) > 0 else None,
-                JSON(manager_duels) if len(manager_duels.keys()) > 0 else None,
-                JSON(h2h_duels) if len(h2h_duels.keys()) > 0 else None,
-                home_score,
-                away_score)))
+            self.convert_match_statistics([event_info])
+
+        def convert_match_statistics(self, events):
+            """Convert the statistics of a list of match events."""
+            self.put(convert_chunk('match_stats', events))
+
+        def _put_match_stats(self, chunk):
+            for id, home_score, away_score, statistics, form, votes, manager_duels, h2h_duels in chunk:
+                self._bulk.add(STATISTICS_TABLE, (
+                    id,
+                    statistics if len(statistics.keys()) > 0 else None,
+                    None,
+                    form if len(form.keys()) > 0 else None,
+                    votes if len(votes.keys()) > 0 else None,
+                    manager_duels if len(manager_duels.keys()) > 0 else None,
+                    h2h_duels if len(h2h_duels.keys()) > 0 else None,
+                    home_score,
+                    away_score))
 
 
         def convert_team_lineup(self, match_id, team_id, lineup_info):
@@ -374,29 +631,27 @@ else:
             formation TEXT [],
             manager_id INTEGER,
             """
-            formation = get_nested(lineup_info, 'formation')
-            manager = get_nested(lineup_info, 'manager', 'id')
+            self.convert_team_lineups([(match_id, team_id, lineup_info)])
+
+        def convert_team_lineups(self, rows):
+            """Convert a list of (match_id, team_id, lineup_info) tuples."""
+            for match_id, team_id, lineup_info in rows:
+                formation, manager = TEAM_LINEUP.row(lineup_info)
 
-            # Create query
-            self._q.put(str(PostgreSQLQuery.into(tables.lineups).insert(
-                match_id,
-                team_id,
-                formation if len(formation) > 0 else None,
-                manager)))
+                self._bulk.add(LINEUPS_TABLE, (
+                    match_id,
+                    team_id,
+                    formation if formation else None,
+                    manager))
 
 
+        @dimension('managers', lambda lineup_info: get_nested(lineup_info, 'manager', 'id'))
         def convert_manager(self, lineup_info):
             """
             manager_id INTEGER PRIMARY KEY,
             manager_name VARCHAR(50)
             """
-            manager_id = get_nested(lineup_info, 'manager', 'id')
-            manager_name = get_nested(lineup_info, 'manager', 'name')
-
-            # Create query
-            self._q.put(str(Query.into(tables.managers).insert(
-                manager_id,
-                manager_name)))
+            self._bulk.add(MANAGERS_TABLE, MANAGER.row(lineup_info))
 
 
         def convert_player_lineup(self, match_id, team_id, lineup_info):
@@ -409,24 +664,24 @@ else:
             sc_rating FLOAT,
             substitute BOOLEAN,
             """
-            player_id = get_nested(lineup_info, 'player', 'id')
-            position_name = get_nested(lineup_info, 'positionName')
-            position_short = get_nested(lineup_info, 'positionNameshort')
-            substitute = get_nested(lineup_info, 'substitute')
-            rating = get_nested(lineup_info, 'rating')
-            rating = safe_cast(rating, float)
-
-            # Create query
-            self._q.put(str(Query.into(tables.player_lineups).insert(
-                match_id,
-                team_id,
-                player_id,
-                position_name,
-                position_short,
-                rating,
-                substitute)))
+            self.convert_player_lineups([(match_id, team_id, lineup_info)])
+
+        def convert_player_lineups(self, rows):
+            """Convert a list of (match_id, team_id, lineup_info) tuples."""
+            for match_id, team_id, lineup_info in rows:
+                player_id, position_name, position_short, substitute, rating = PLAYER_LINEUP.row(lineup_info)
+
+                self._bulk.add(PLAYER_LINEUPS_TABLE, (
+                    match_id,
+                    team_id,
+                    player_id,
+                    position_name,
+                    position_short,
+                    rating,
+                    substitute))
 
 
+        @dimension('players', lambda player_info: get_nested(player_info, 'id'))
         def convert_player_ref(self, player_info):
             """
             sc_player_id INTEGER PRIMARY KEY,
@@ -437,20 +692,16 @@ else:
             birth_date DATE,
             height FLOAT
             """
-            name = get_nested(player_info, 'name')
-            id = get_nested(player_info, 'id')
-            slug = get_nested(player_info, 'slug')
-            short = get_nested(player_info, 'shortName')
+            id, name, slug, short = PLAYER.row(player_info)
 
-            # Create query
-            self._q.put(str(Query.into(tables.players).insert(
+            self._bulk.add(PLAYERS_TABLE, (
                 id,
                 None,
                 name,
                 slug,
                 short,
                 None,
-                None)))
+                None))
 
 
         def convert_player_stats(self, match_id, player_id, stat_info):
@@ -465,75 +716,27 @@ else:
             FOREIGN KEY (match_id) REFERENCES Matches,
             FOREIGN KEY (sc_player_id) REFERENCES Players_ref
             """
-            def parse_value(d, keys):
-                for key in listify(keys):
-                    name_val_pair = d.get(key)
-                    if name_val_pair is None:
-                        continue
-                    if 'raw' in name_val_pair.keys():
-                        return safe_cast(name_val_pair['raw'], int)
-                    name, val = name_val_pair.values()
-                    val = re.findall(r'\d+', val)
-                    if len(val) == 0:
-                        continue
-                    return safe_cast(val[0], int)
-                return ""
-
-            def parse_statistics(stat_dict):
-                # normal player
-                stats = {}
-                try:
-                    gr = stat_dict['groups']
-
-                    # Summary
-                    stats['goalAssist'] = parse_value(get_nested(gr, 'summary', 'items'), 'goalAssist')
-                    stats['goals'] = parse_value(get_nested(gr, 'summary', 'items'), 'goals')
-                    stats['minutesPlayed'] = parse_value(get_nested(gr, 'summary', 'items'), 'minutesPlayed')
-                    # Attack
-                    stats['shotsBlocked'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsBlocked')
-                    stats['shotsOffTarget'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsOffTarget')
-                    stats['shotsOnTarget'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsOnTarget')
-                    stats['totalContest'] = parse_value(get_nested(gr, 'attack', 'items'), 'totalContest')
-                    # Defence
-                    stats['challengeLost'] = parse_value(get_nested(gr, 'defence', 'items'), 'challengeLost')
-                    stats['interceptionWon'] = parse_value(get_nested(gr, 'defence', 'items'), ['interceptionWon', 'interceptionWin'])
-                    stats['outfielderBlock'] = parse_value(get_nested(gr, 'defence', 'items'), 'outfielderBlock')
-                    stats['totalClearance'] = parse_value(get_nested(gr, 'defence', 'items'), 'totalClearance')
-                    stats['totalTackle'] = parse_value(get_nested(gr, 'defence', 'items'), ['wonTackel', 'totalTackle'])
-                    # Duels
-                    stats['dispossessed'] = parse_value(get_nested(gr, 'duels', 'items'), 'dispossessed')
-                    stats['fouls'] = parse_value(get_nested(gr, 'duels', 'items'), 'fouls')
-                    stats['totalDuels'] = parse_value(get_nested(gr, 'duels', 'items'), ['totalDuels', 'groundDuels'])
-                    stats['wasFouled'] = parse_value(get_nested(gr, 'duels', 'items'), 'wasFouled')
-                    # Passing
-                    stats['accuratePass'] = parse_value(get_nested(gr, 'passing', 'items'), 'accuratePass')
-                    stats['keyPass'] = parse_value(get_nested(gr, 'passing', 'items'), 'keyPass')
-                    stats['totalCross'] = parse_value(get_nested(gr, 'passing', 'items'), 'totalCross')
-                    stats['totalLongBalls'] = parse_value(get_nested(gr, 'passing', 'items'), 'totalLongBalls')
-
-                    if len(gr) == 6:
-                        # goalkeeper
-                        stats['goodHighClaim'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'goodHighClaim')
-                        stats['punches'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'punches')
-                        stats['runsOut'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'runsOut')
-                        stats['saves'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'saves')
-                except KeyError:
-                    pass
-
-                return stats
-
-            stat = parse_statistics(stat_info)
-
-            has_sc_stat = True if stat is not None else False
-            # Create query
-            self._q.put(str(Query.into(tables.players_stats).insert(
-                player_id,
-                match_id,
-                JSON(stat) if len(stat.keys()) > 0 else None,
-                None,
-                has_sc_stat,
-                True)))
-
+            self.convert_player_stats_batch([(match_id, player_id, stat_info)])
+
+        def convert_player_stats_batch(self, rows):
+            """Convert a list of (match_id, player_id, stat_info) tuples."""
+            self.put(convert_chunk('player_stats', rows))
+
+        def _put_player_stats(self, chunk):
+            ids, matrix = chunk
+            for (player_id, match_id), record in zip(ids, matrix):
+                stat = player_stats_to_dict(record)
+
+                has_sc_stat = True if stat is not None else False
+                self._bulk.add(PLAYERS_STATS_TABLE, (
+                    player_id,
+                    match_id,
+                    stat if len(stat.keys()) > 0 else None,
+                    None,
+                    has_sc_stat,
+                    True))
+
+        @dimension('stadiums', lambda event_info: get_nested(event_info, 'event', 'venue', 'id'))
         def convert_stadium_ref(self, event_info):
             """
             stadium_id INTEGER PRIMARY KEY,
@@ -542,46 +745,229 @@ else:
             name VARCHAR(50),
             capacity INTEGER
             """
-            id = get_nested(event_info, 'event', 'venue', 'id')
-            country = get_nested(event_info, 'event', 'venue', 'country', 'name')
-            city = get_nested(event_info, 'event', 'venue', 'city', 'name')
-            name = get_nested(event_info, 'event', 'venue', 'stadium', 'name')
-            capcity = get_nested(event_info, 'event', 'venue', 'stadium', 'capacity')
-            capcity = safe_cast(capcity, int)
-
-            # Create query
-            self._q.put(str(Query.into(tables.stadiums).insert(
-                id,
-                country,
-                city,
-                name,
-                capcity)))
+            self._bulk.add(STADIUMS_TABLE, STADIUM.row(event_info))
+
+    class SqliteConverter(SqlBaseConverter):
+        """Write the tables to an embedded SQLite database, the result of the converter is the path of the database.
+
+        The database is opened in WAL mode, so it can be read while the scraping runs. The missing tables are created
+        with indexes on the match and player ids, and every batch is written with a single executemany().
+        """
+
+        def _connect(self, **kwargs):
+            database = kwargs.get('database', DEFAULT_DATABASE)
+            connection = kwargs.get('connection', None)
+            # Only the connection opened by the converter is closed by it
+            self._own_conn = connection is None
+            self._conn = connection if connection is not None else connect_sqlite(database, SQL_TABLES)
+            self._result = database
+
+        def _make_writer(self):
+            return SqliteWriter(self._conn)
+
+        def close(self):
+            try:
+                super(SqliteConverter, self).close()
+            finally:
+                if self._own_conn:
+                    self._conn.close()
+
+    try:
+        # Internal package imports
+        from db_conn.query.sc_soccer import tables
+        from db_conn.queue import InsertQueue
+        from db_conn.connection.postgresql import ConnectionPool
+
+    except ImportError as err:
+        logger.warning(err)
+    else:
+        class SqlConverter(SqlBaseConverter):
+            """Write the rows to PostgreSQL through the InsertQueue of db_conn.
+
+            The InsertQueue only takes SQL strings, it has no parameters. So by default every batch is rendered into
+            a single multi-row statement with inline values by a StatementWriter, and the parameterized templates
+            are not used on this path. This is a limitation of the queue. To send (template, parameters) batches
+            with executemany(), pass writer=ExecutemanyWriter(connection) with a DB-API connection, e.g. psycopg2.
+            """
+
+            def _connect(self, **kwargs):
+                conn_config = kwargs.pop('config', {})
+                conn = kwargs.pop('connection', ConnectionPool(config=conn_config))
+                self._q = kwargs.get('queue', InsertQueue(pool=conn, **kwargs))
+                self._fired = []
+
+            def _make_writer(self):
+                # The queue takes rendered statements only, see the class docstring
+                sink = self._q.put if self._queue_size is None else self._fire
+                return StatementWriter(sink, query=PostgreSQLQuery,
+                                       tables={schema.name: getattr(tables, schema.name) for schema in SQL_TABLES})
+
+            def _fire(self, statement):
+                # The background writer fires the queue for every batch, instead of once at the end
+                self._q.put(statement)
+                self._fired.append(self._q.fire_workers())
+
+            def flush(self):
+                super(SqlConverter, self).flush()
+                if self._queue_size is None:
+                    self._result = self._q.fire_workers()
+                else:
+                    # The results of the batches fired in the background
+                    self._result = list(self._fired)
 
 
 class DfConverter(Converter):
 
-    def __init__(self, *args, **kwargs):
-        # Define all the tables
-        self._tournaments_df = pd.DataFrame()
-        self._teams_df = pd.DataFrame()
-        self._seasons_df = pd.DataFrame()
-        self._matches_df = pd.DataFrame()
-        self._referees_df = pd.DataFrame()
-        self._odds_df = pd.DataFrame()
-        self._match_stats_df = pd.DataFrame()
-        self._team_lineups_df = pd.DataFrame()
-        self._managers_df = pd.DataFrame()
-        self._player_lineups_df = pd.DataFrame()
-        self._players_df = pd.DataFrame()
-        self._player_stats_df = pd.DataFrame()
-        self._stadiums_df = pd.DataFrame()
+    # Columns of the tables which are buffered as tuples
+    table_columns = {
+        'matches': MATCH.names + ['tournament_id'],
+        'team_lineups': ['match_id', 'team_id'] + TEAM_LINEUP.names,
+        'player_lineups': ['match_id', 'team_id'] + PLAYER_LINEUP.names,
+    }
+    tables = ['matches', 'odds', 'match_stats', 'team_lineups', 'player_lineups', 'player_stats']
 
+    def __init__(self, *args, **kwargs):
+        self._timezone = kwargs.pop('timezone', DEFAULT_TIMEZONE)
+        # Above this many buffered bytes the tables are spilled to disk. None keeps everything in memory.
+        self._memory_limit = kwargs.pop('memory_limit', None)
+        self._spill_root = kwargs.pop('spill_dir', None)
+        # The spilled rows are partitioned by the match_id, get() joins the tables one partition at a time
+        self._spill_partitions = kwargs.pop('spill_partitions', DEFAULT_SPILL_PARTITIONS)
+        self._spill_dir = None
+        self._spilled = []
+        self._buffered_bytes = 0
+        self._local_bytes = local()
+        self._spill_lock = Lock()
         super(DfConverter, self).__init__(*args, **kwargs)
 
+    def close(self):
+        super(DfConverter, self).close()
+        with self._spill_lock:
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+            self._spilled = []
+
+    def _dimension_df(self, table, columns):
+        # Dimension rows are shared by all the converters of the run, the first column is the primary key
+        return pd.DataFrame(self._cache.rows(table), columns=columns).set_index(columns[0])
+
+    def put(self, chunk):
+        """Store a chunk made by convert_chunk()."""
+        table, data = chunk
+        self._store(table, [data])
+
+    def _store(self, table, rows):
+        self._rows.extend(table, rows)
+        if self._memory_limit is None:
+            return
+        nbytes = _approx_nbytes(rows)
+        self._local_bytes.nbytes = getattr(self._local_bytes, 'nbytes', 0) + nbytes
+        with self._spill_lock:
+            self._buffered_bytes += nbytes
+            spill = self._buffered_bytes > self._memory_limit
+        if spill:
+            self._spill()
+
+    def _spill(self):
+        """Write the tables buffered by the calling thread to chunk files. Every thread spills only its own rows."""
+        with self._spill_lock:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix='miner-', dir=self._spill_root)
+            spill_dir = self._spill_dir
+        for table in self.tables:
+            rows = self._rows.pop_local(table)
+            if len(rows) == 0:
+                continue
+            for partition, frame in self._partition(self._frame(table, rows)).items():
+                path = os.path.join(spill_dir, '%s-%s-%s.pkl' % (table, partition, uuid4().hex))
+                frame.to_pickle(path)
+                with self._spill_lock:
+                    self._spilled.append((table, partition, path))
+        with self._spill_lock:
+            self._buffered_bytes -= self._local_bytes.nbytes
+        self._local_bytes.nbytes = 0
+
+    def _frame(self, table, rows):
+        """Compact the buffered rows of the table into a DataFrame."""
+        if table in self.table_columns:
+            return pd.DataFrame(rows, columns=self.table_columns[table])
+        if table == 'odds':
+            ids = pd.DataFrame([match_id for chunk_ids, _ in rows for match_id in chunk_ids], columns=['match_id'])
+            return pd.concat([ids, pd.DataFrame(_stack([matrix for _, matrix in rows], len(ODDS_COLUMNS)), columns=ODDS_COLUMNS)], axis=1)
+        if table == 'player_stats':
+            ids = pd.DataFrame([ids for chunk_ids, _ in rows for ids in chunk_ids], columns=['sc_player_id', 'match_id'])
+            return pd.concat([ids, pd.DataFrame(_stack([matrix for _, matrix in rows], len(PLAYER_STAT_COLUMNS)), columns=PLAYER_STAT_COLUMNS)], axis=1)
+        # Match statistics: the keys vary per match
+        stats = []
+        for chunk in rows:
+            for row in chunk:
+                temp = dict(zip(MATCH_SCORE.names, row[:len(MATCH_SCORE.names)]))
+                for group in row[len(MATCH_SCORE.names):]:
+                    temp.update(group)
+                stats.append(temp)
+        return pd.DataFrame(stats, columns=MATCH_SCORE.names if len(stats) == 0 else None)
+
+    def _partition(self, frame):
+        """Split the frame of a table by the match_id into the spill partitions."""
+        if 'match_id' not in frame.columns or len(frame.index) == 0:
+            return {}
+        keys = pd.to_numeric(frame['match_id'], errors='coerce').fillna(0).astype('int64') % self._spill_partitions
+        return {partition: part.reset_index(drop=True) for partition, part in frame.groupby(keys, sort=False)}
+
+    def _table(self, table, partition=None, memory=None):
+        """Return the table, the spilled chunks are read back and merged with the rows of every worker.
+
+        :param partition: return only the rows of this spill partition
+        :param memory: the in-memory rows of the table, already split with _partition()
+        """
+        with self._spill_lock:
+            paths = [path for spilled, part, path in self._spilled
+                     if spilled == table and (partition is None or part == partition)]
+        frames = [pd.read_pickle(path) for path in paths]
+        if partition is None:
+            rows = self._rows.rows(table)
+            if len(rows) > 0 or len(frames) == 0:
+                frames.append(self._frame(table, rows))
+        elif memory is not None and partition in memory:
+            frames.append(memory[partition])
+        if len(frames) == 0:
+            return self._frame(table, [])
+        return pd.concat(frames, ignore_index=True, sort=False) if len(frames) > 1 else frames[0]
+
+    def iter_get(self):
+        """Yield the (matches, player_stats) frames one spill partition at a time.
+
+        Without spilled rows the whole result is a single partition. Otherwise only the rows of one partition are
+        read back and joined at a time, so an export can write the result while the memory stays bounded.
+        """
+        with self._spill_lock:
+            spilled = len(self._spilled) > 0
+        if not spilled:
+            yield self._join({table: self._table(table) for table in self.tables})
+            return
+        # The rows still in memory are split once, as the spilled ones were
+        memory = {table: self._partition(self._frame(table, self._rows.rows(table))) for table in self.tables}
+        for partition in range(self._spill_partitions):
+            tables = {table: self._table(table, partition, memory[table]) for table in self.tables}
+            if len(tables['matches'].index) > 0 or len(tables['player_stats'].index) > 0:
+                yield self._join(tables)
+
     def get(self):
+        results = list(self.iter_get())
+        if len(results) == 1:
+            return results[0]
+        # The joined columns differ per partition, e.g. the offered markets
+        return concat_frames([matches for matches, _ in results]), \
+            pd.concat([player_stats for _, player_stats in results], ignore_index=True)
+
+    def _join(self, tables):
+        """Join the fact tables of the matches with the dimension tables."""
 
         def join_player_lineup(lineups, matches):
             df_list = []
+            # The home team of every match is looked up by the match_id
+            home_teams = matches.set_index('match_id')['home_team_id']
 
             match_grp = lineups.groupby('match_id')
             for match_id, e_match_grp in match_grp:
@@ -593,8 +979,7 @@ class DfConverter(Converter):
                 for team_id, e_team_grp in team_grp:
                     # TODO: Remove the grouped column
                     fixed_e_team_grp = e_team_grp.drop('team_id', axis=1)
-                    matches_filtered = matches[matches['match_id'] == match_id]
-                    if matches_filtered['home_team_id'].iloc[0] == team_id:
+                    if home_teams.get(match_id) == team_id:
                         prefix = 'home'
                     else:
                         prefix = 'away'
@@ -610,70 +995,56 @@ class DfConverter(Converter):
                 new_df['match_id'] = match_id
                 df_list.append(new_df)
 
+            if len(df_list) == 0:
+                return pd.DataFrame(columns=['match_id'])
             return pd.concat(df_list)
 
-        joined_df = self._matches_df
-        joined_df = pd.merge(joined_df, self._tournaments_df, how='left', left_on='tournament_id',
-                             right_on='tournament_id', copy=False)
-
-        joined_df = pd.merge(joined_df, self._seasons_df, how='left', left_on='season_id',
-                             right_on='season_id', copy=False)
-
-        joined_df = pd.merge(joined_df, self._teams_df, how='left', left_on='home_team_id',
-                             right_on='team_id')
-        joined_df = joined_df.rename(columns={'team_name': 'home_team_name', 'team_slug': 'home_team_slug', 'team_short': 'home_team_short'})
-
-        joined_df = pd.merge(joined_df, self._teams_df, how='left', left_on='away_team_id',
-                             right_on='team_id')
-        joined_df = joined_df.rename(columns={'team_name': 'away_team_name', 'team_slug': 'away_team_slug', 'team_short': 'away_team_short'})
-
-        joined_df = pd.merge(joined_df, self._referees_df, how='left', left_on='referee_id',
-                             right_on='referee_id', copy=False)
+        # Dimension tables are indexed by their primary key, and resolved with index lookups
+        tournaments_df = self._dimension_df('tournaments', TOURNAMENT.names)
+        seasons_df = self._dimension_df('seasons', SEASON.names)
+        teams_df = self._dimension_df('teams', TEAM.names)
+        referees_df = self._dimension_df('referees', REFEREE.names)
+        managers_df = self._dimension_df('managers', MANAGER.names)
+        stadiums_df = self._dimension_df('stadiums', STADIUM.names)
 
-        joined_df = pd.merge(joined_df, self._odds_df, how='left', left_on='match_id',
-                             right_on='match_id', copy=False)
+        matches_df = tables['matches']
 
-        joined_df = pd.merge(joined_df, self._match_stats_df, how='left', left_on='match_id',
-                             right_on='match_id', copy=False)
+        joined_df = matches_df.copy()
+        if len(joined_df.index) > 0:
+            joined_df['match_date'], joined_df['full_date'] = convert_match_dates(
+                joined_df['match_date'], joined_df['full_date'], self._timezone)
+        joined_df = joined_df.join(tournaments_df, on='tournament_id')
+        joined_df = joined_df.join(seasons_df, on='season_id')
+        joined_df = joined_df.join(teams_df.add_prefix('home_'), on='home_team_id')
+        joined_df = joined_df.join(teams_df.add_prefix('away_'), on='away_team_id')
+        joined_df = joined_df.join(referees_df, on='referee_id')
 
-        home_lineup = pd.merge(self._team_lineups_df, self._managers_df, how='left', left_on='manager_id',
-                             right_on='manager_id')
-        home_lineup = home_lineup.rename(columns={'formation': 'home_formation', 'manager_id': 'home_manager_id', 'manager_name': 'home_manager_name'})
+        # Only the markets offered for any of the matches are joined
+        joined_df = joined_df.join(tables['odds'].set_index('match_id').dropna(axis='columns', how='all'), on='match_id')
+        joined_df = joined_df.join(tables['match_stats'].set_index('match_id'), on='match_id')
 
-        away_lineup = pd.merge(self._team_lineups_df, self._managers_df, how='left', left_on='manager_id',
-                             right_on='manager_id')
-        away_lineup = away_lineup.rename(columns={'formation': 'away_formation', 'manager_id': 'away_manager_id', 'manager_name': 'away_manager_name'})
+        # The lineups are joined with their managers once, and looked up for both of the teams
+        lineups_df = tables['team_lineups'].join(managers_df, on='manager_id').set_index(['match_id', 'team_id'])
+        joined_df = joined_df.join(lineups_df.add_prefix('home_'), on=['match_id', 'home_team_id'])
+        joined_df = joined_df.join(lineups_df.add_prefix('away_'), on=['match_id', 'away_team_id'])
 
-        joined_df = pd.merge(joined_df, home_lineup, how='left', left_on=['match_id', 'home_team_id'],
-                             right_on=['match_id', 'team_id'])
-        joined_df = joined_df.rename(columns={'formation': 'home_formation'})
+        joined_df = joined_df.join(stadiums_df, on='stadium_id')
 
-        joined_df = pd.merge(joined_df, away_lineup, how='left', left_on=['match_id', 'away_team_id'],
-                             right_on=['match_id', 'team_id'])
-        joined_df = joined_df.rename(columns={'formation': 'away_formation'})
+        flattened_lineups = join_player_lineup(tables['player_lineups'], matches_df)
+        joined_df = joined_df.join(flattened_lineups.set_index('match_id'), on='match_id')
 
-        joined_df = pd.merge(joined_df, self._stadiums_df, how='left', left_on='stadium_id',
-                             right_on='stadium_id', copy=False)
-
-        flattened_lineups = join_player_lineup(self._player_lineups_df, self._matches_df)
-
-        joined_df = pd.merge(joined_df, flattened_lineups, how='left', left_on='match_id',
-                             right_on='match_id', copy=False)
-
-        return joined_df, self._player_stats_df
+        return joined_df, tables['player_stats']
 
+    @dimension('tournaments', lambda tr: get_nested(tr, 'tournament', 'uniqueId'))
     def convert_tournaments(self, tr):
         """
         tournament_id INTEGER PRIMARY KEY,
         tournament_name VARCHAR(100),
         tournament_short VARCHAR(50)
         """
-        temp = {}
-        temp['tournament_id'] = safe_cast(get_nested(tr, 'tournament', 'uniqueId'), int)
-        temp['tournament_name'] = get_nested(tr,'tournament', 'name')
-        temp['tournament_short'] = get_nested(tr, 'tournament', 'slug')
-        self._tournaments_df = self._tournaments_df.append(temp, ignore_index=True)
+        return TOURNAMENT(tr)
 
+    @dimension('seasons', lambda season: get_nested(season, 'id'))
     def convert_season(self, season):
         """
         season_id INTEGER PRIMARY KEY,
@@ -681,13 +1052,9 @@ class DfConverter(Converter):
         season_name VARCHAR(50),
         season_slug VARCHAR(50)
         """
-        temp = {}
-        temp['season_id'] = safe_cast(get_nested(season, 'id'), int)
-        temp['season_year'] = get_nested(season, 'year')
-        temp['season_name'] = get_nested(season, 'name')
-        temp['season_slug'] = get_nested(season, 'slug')
-        self._seasons_df = self._seasons_df.append(temp, ignore_index=True)
+        return SEASON(season)
 
+    @dimension('teams', lambda team: get_nested(team, 'id'))
     def convert_teams(self, team):
         """
         team_id INTEGER PRIMARY KEY,
@@ -695,12 +1062,7 @@ class DfConverter(Converter):
         team_slug VARCHAR(50),
         team_short VARCHAR(50)
         """
-        temp = {}
-        temp['team_id'] = safe_cast(get_nested(team, 'id'), int)
-        temp['team_name'] = get_nested(team, 'name')
-        temp['team_slug'] = get_nested(team, 'slug')
-        temp['team_short'] = get_nested(team, 'shortName')
-        self._teams_df = self._teams_df.append(temp, ignore_index=True)
+        return TEAM(team)
 
     def convert_match(self, event_info, tr_id):
         """
@@ -714,52 +1076,16 @@ class DfConverter(Converter):
         referee_id INTEGER,
         stadium_id INTEGER,
         """
-        temp = {}
-        temp['match_id'] = safe_cast(get_nested(event_info, 'event', 'id'), int)
-        temp['season_id'] = safe_cast(get_nested(event_info, 'event', 'season', 'id'), int)
-
-        formatted_date = get_nested(event_info, 'event', 'formatedStartDate')
-        formatted_full_date = get_nested(event_info, 'event', 'startTime')
-        try:
-            concat_str = formatted_date + ' ' + formatted_full_date
-            formatted_date = datetime.strptime((formatted_date), '%d.%m.%Y.')
-            #formatted_date = "%d-%02d-%02d" % (formatted_date.year, formatted_date.month, formatted_date.day)
-
-            formatted_full_date = datetime.strptime((concat_str), '%d.%m.%Y. %H:%M')
-            #formatted_full_date = "%d-%02d-%02d %02d:%02d" % (formatted_full_date.year, formatted_full_date.month, formatted_full_date.day, formatted_full_date.hour, formatted_full_date.minute)
-        except Exception as err:
-            formatted_full_date = None
-            formatted_date = None
+        self.convert_matches([event_info], [tr_id])
 
-        try:
-            import pytz
-            from pytz import timezone
-
-            # This code snippet is taking the Sofascore Time informations which is defined in GMT+0
-            gmt0 = timezone('Etc/GMT+0')
-            gmt0_time = gmt0.localize(formatted_full_date)
-            # Getting the local timezone. (For us Budapest is enough) it is in GMT+1 or GMT+2 n the summer
-            local_tz = timezone('Europe/Budapest')
-            # Convert the Sofascore time infromation from GMT+0 to GMT+2
-            formatted_full_date = gmt0_time.astimezone(local_tz)
-
-        except ImportError as err:
-            logger.error("Please install pytz like: pip install pytz")
-
-        temp['full_date'] = formatted_full_date
-        temp['match_date'] = formatted_date
-
-        temp['tournament_id'] = safe_cast(tr_id, int)
-
-        temp['match_status'] = get_nested(event_info, 'event', 'status', 'type')
-        temp['home_team_id'] = safe_cast(get_nested(event_info, 'event', 'homeTeam', 'id'), int)
-        temp['away_team_id'] = safe_cast(get_nested(event_info, 'event', 'awayTeam', 'id'), int)
-
-        temp['referee_id'] = safe_cast(get_nested(event_info, 'event', 'referee', 'id'), int)
-        temp['stadium_id'] = safe_cast(get_nested(event_info, 'event', 'venue', 'id'), int)
-
-        self._matches_df = self._matches_df.append(temp, ignore_index=True)
+    def convert_matches(self, events, tr_ids=None):
+        """Convert a list of match events in one pass. The tournament ids default to the tournament of the events."""
+        if tr_ids is None:
+            tr_ids = [get_nested(event, 'event', 'tournament', 'uniqueId') for event in events]
+        # The timestamps are kept in UTC, and converted together on get()
+        self._store('matches', [MATCH.row(event) + (safe_cast(tr_id, int),) for event, tr_id in zip(events, tr_ids)])
 
+    @dimension('referees', lambda event_info: get_nested(event_info, 'event', 'referee', 'id'))
     def convert_referee(self, event_info):
         """
         referee_id INTEGER PRIMARY KEY,
@@ -767,13 +1093,7 @@ class DfConverter(Converter):
         yellow_card_per_game FLOAT,
         red_card_per_game FLOAT
         """
-        temp = {}
-        temp['referee_id'] = safe_cast(get_nested(event_info, 'event', 'referee', 'id'), int)
-        yellow_card = get_nested(event_info, 'event', 'referee', 'yellowCardsPerGame')
-        red_card = get_nested(event_info, 'event', 'referee', 'redCardsPerGame')
-        temp['yellow_card_per_game'] = safe_cast(yellow_card, float)
-        temp['red_card_per_game'] = get_nested(event_info, 'event', 'referee', 'name')
-        self._referees_df = self._referees_df.append(temp, ignore_index=True)
+        return REFEREE(event_info)
 
     def convert_match_odds(self, event_id, data_odds):
         """
@@ -781,65 +1101,15 @@ class DfConverter(Converter):
         sc_odds JSON,
         fd_odds JSON
         """
-        tempdict = {}
-
-        ord_markets = ['Full time', 'Double chance', '1st half', 'Draw no bet', 'Both teams to score', '']
-        special_markets = ['Match goals', 'Asian handicap', 'First team to score']
-        def replace_name(name):
-            replaced = ""
-            for c in name:
-                if c == '1':
-                    replaced += 'home'
-                elif c == '2':
-                    replaced += 'away'
-                elif c.lower() == 'x':
-                    replaced += 'draw'
-                else:
-                    break
-                replaced += '_'
-            if len(replaced) > 0:
-                return replaced[:-1]
-            else:
-                return name
-
-        def split_odds(fractional_velue):
-            try:
-                x1, x2 = fractional_velue.split("/")
-                decimal_value = (int(x1) / int(x2)) + 1
-                return decimal_value
-            except Exception:
-                return 0
-
-        odds = data_odds['markets']
-        try:
-            for odd in odds:
-                # First check if the market is an ordnary type.
-                if odd['marketName'] in ord_markets:
-                    prefix = odd['marketName'].lower().replace(' ', '_')
-                    for choice in odd['choices']:
-                        tempdict['%s_%s' % (prefix, replace_name(choice['name']))] = split_odds(choice['fractionalValue'])
-
-                elif odd['marketName'] in special_markets:
-                    if odd['marketName'] == 'Match goals':
-                        prefix = odd['choiceGroup'].lower().replace('.', '_')
-                        for choice in odd['choices']:
-                            tempdict['%s_%s' % (prefix, choice['name'].lower())] = split_odds(choice['fractionalValue'])
-                    if odd['marketName'] == 'Asian handicap':
-                        prefix = odd['marketName'].lower().replace(' ', '_')
-                        tempdict['%s_home' % prefix] = split_odds(odd['choices'][0]['fractionalValue'])
-                        tempdict['%s_away' % prefix] = split_odds(odd['choices'][1]['fractionalValue'])
-                    if odd['marketName'] == 'First team to score':
-                        prefix = odd['marketName'].lower().replace(' ', '_')
-                        tempdict['%s_home' % prefix] = split_odds(odd['choices'][0]['fractionalValue'])
-                        tempdict['%s_away' % prefix] = split_odds(odd['choices'][1]['fractionalValue'])
-                else:
-                    pass
-                    # Currently not supported. Skip it
-        except Exception:
-            pass
+        self.convert_match_odds_batch([(event_id, data_odds)])
+
+    def convert_match_odds_batch(self, rows):
+        """Convert a list of (event_id, data_odds) pairs."""
+        self.put(convert_chunk('odds', rows))
 
-        tempdict['match_id'] = safe_cast(event_id, int)
-        self._odds_df = self._odds_df.append(tempdict, ignore_index=True)
+    def odds_matrix(self):
+        """Return the odds as a dense float32 matrix, indexed by the match_id, with the ODDS_COLUMNS columns."""
+        return self._table('odds').set_index('match_id')
 
     def convert_match_statistic(self, event_info):
         """
@@ -853,116 +1123,15 @@ class DfConverter(Converter):
         home_score FLOAT,
         away_score FLOAT,
         """
+        self.convert_match_statistics([event_info])
 
-        def parse_statistics(statistics):
-            temp_dict = {}
-            try:
-                for period in statistics['periods']:
-                    try:
-                        prefix = period['period'].lower() + '_'
+    def convert_match_statistics(self, events):
+        """Convert the statistics of a list of match events."""
+        self.put(convert_chunk('match_stats', events))
 
-                        for group in period['groups']:
-                            try:
-                                for item in group['statisticsItems']:
-                                    try:
-                                        item_name = item['name'].lower().replace(' ', '_')
-                                        temp_dict['%s_%s_home' % (prefix, item_name)] = item['home']
-                                        temp_dict['%s_%s_away' % (prefix, item_name)] = item['away']
-                                    except Exception:
-                                        continue
-                            except Exception:
-                                continue
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-            return temp_dict
-
-        def parse_teams_form(form):
-            temp_dict = {}
-
-            def parse_form(team, name):
-                temp_dict = {}
-                temp_dict['%s_avg_rating' % name] = safe_cast(team['avgRating'], float, default="")
-                temp_dict['%s_position' % name] = safe_cast(team['position'], int, default="")
-                temp_dict['%s_points' % name] = safe_cast(team['points'], float, default="")
-                for idx, form in enumerate(team['form']):
-                    temp_dict['%s_form_%s' % (name, idx)] = form
-                return temp_dict
-            try:
-                temp_dict = { **temp_dict, **parse_form(form['homeTeam'], 'home') }
-                temp_dict = {**temp_dict, **parse_form(form['awayTeam'], 'away')}
-            except Exception:
-                pass
-            return temp_dict
-
-        def convert_vote(votes):
-            dataframe_dict = {}
-            # Get the votes
-            try:
-                dataframe_dict['vote_home'] = get_nested(votes, 'vote1', default="")
-                dataframe_dict['vote_away'] = get_nested(votes, 'vote2', default="")
-                dataframe_dict['vote_draw'] = get_nested(votes, 'voteX', default="")
-                dataframe_dict['vote_home_perc'] = get_nested(votes, 'vote1ScaledPercentage', default="")
-                dataframe_dict['vote_away_perc'] = get_nested(votes, 'vote2ScaledPercentage', default="")
-                dataframe_dict['vote_draw_perc'] = get_nested(votes, 'voteXScaledPercentage', default="")
-            except Exception:
-                pass
-
-            return dataframe_dict
-
-        def convert_managerduel(manager_duels):
-            dataframe_dict = {}
-            try:
-                # Get manager duels
-                dataframe_dict['manager_home_win'] = get_nested(manager_duels, 'homeManagerWins', default="")
-                dataframe_dict['manager_away_win'] = get_nested(manager_duels, 'awayManagerWins', default="")
-                dataframe_dict['manager_home'] = get_nested(manager_duels, 'homeManager', 'id', default="")
-                dataframe_dict['manager_away'] = get_nested(manager_duels, 'awayManager', 'id', default="")
-            except Exception:
-                pass
-
-            return dataframe_dict
-
-        def convert_h2hduels(h2h_duels):
-            dataframe_dict = {}
-            try:
-                # Get h2h
-                dataframe_dict['h2h_home'] = get_nested(h2h_duels, 'homewins', default="")
-                dataframe_dict['h2h_away'] = get_nested(h2h_duels, 'awaywins', default="")
-                dataframe_dict['h2h_draw'] = get_nested(h2h_duels, 'draws', default="")
-            except Exception:
-                pass
-
-            return dataframe_dict
-
-        temp = {}
-        temp['match_id'] = safe_cast(get_nested(event_info, 'event', 'id'), int)
-        home_score = get_nested(event_info, 'event', 'homeScore', 'current', default="")
-        away_score = get_nested(event_info, 'event', 'awayScore', 'current', default="")
-        home_score = safe_cast(home_score, float)
-        away_score = safe_cast(away_score, float)
-        # Parse the match statistics
-        statistics = parse_statistics(event_info['statistics'])
-        # Parse the team form
-        form = parse_teams_form(event_info['teamsForm'])
-        # Update votes
-        votes = convert_vote(event_info['vote'])
-        # Update manager duels
-        manager_duels = convert_managerduel(event_info['managerDuel'])
-        # Update the h2h duels
-        h2h_duels = convert_h2hduels(event_info['h2hDuel'])
-
-        temp['home_score'] = home_score
-        temp['away_score'] = away_score
-
-        temp = { **temp, **statistics }
-        temp = {**temp, **form}
-        temp = {**temp, **votes}
-        temp = {**temp, **manager_duels}
-        temp = {**temp, **h2h_duels}
-
-        self._match_stats_df = self._match_stats_df.append(temp, ignore_index=True)
+    def match_stats(self):
+        """Return the match statistics, one row per match."""
+        return self._table('match_stats')
 
     def convert_team_lineup(self, match_id, team_id, lineup_info):
         """
@@ -971,24 +1140,20 @@ class DfConverter(Converter):
         formation TEXT [],
         manager_id INTEGER,
         """
-        temp = {}
-        temp['match_id'] = safe_cast(match_id, int)
-        temp['team_id'] = safe_cast(team_id, int)
-        temp['formation'] = get_nested(lineup_info, 'formation')
-        temp['manager_id'] = safe_cast(get_nested(lineup_info, 'manager', 'id'), int)
+        self.convert_team_lineups([(match_id, team_id, lineup_info)])
 
-        self._team_lineups_df = self._team_lineups_df.append(temp, ignore_index=True)
+    def convert_team_lineups(self, rows):
+        """Convert a list of (match_id, team_id, lineup_info) tuples."""
+        self._store('team_lineups', [(safe_cast(match_id, int), safe_cast(team_id, int)) + TEAM_LINEUP.row(lineup_info)
+                                     for match_id, team_id, lineup_info in rows])
 
+    @dimension('managers', lambda lineup_info: get_nested(lineup_info, 'manager', 'id'))
     def convert_manager(self, lineup_info):
         """
         manager_id INTEGER PRIMARY KEY,
         manager_name VARCHAR(50)
         """
-        temp = {}
-        temp['manager_id'] = safe_cast(get_nested(lineup_info, 'manager', 'id'), int)
-        temp['manager_name'] = get_nested(lineup_info, 'manager', 'name')
-
-        self._managers_df = self._managers_df.append(temp, ignore_index=True)
+        return MANAGER(lineup_info)
 
     def convert_player_lineup(self, match_id, team_id, lineup_info):
         """
@@ -1000,18 +1165,14 @@ class DfConverter(Converter):
         sc_rating FLOAT,
         substitute BOOLEAN,
         """
-        temp = {}
-        temp['match_id'] = safe_cast(match_id, int)
-        temp['team_id'] = safe_cast(team_id, int)
-        temp['sc_player_id'] = safe_cast(get_nested(lineup_info, 'player', 'id'), int)
-        temp['player_position_long'] = get_nested(lineup_info, 'positionName')
-        temp['player_position_short'] = get_nested(lineup_info, 'positionNameshort')
-        temp['substitute'] = get_nested(lineup_info, 'substitute')
-        rating = get_nested(lineup_info, 'rating')
-        temp['sc_rating'] = safe_cast(rating, float)
-
-        self._player_lineups_df = self._player_lineups_df.append(temp, ignore_index=True)
+        self.convert_player_lineups([(match_id, team_id, lineup_info)])
+
+    def convert_player_lineups(self, rows):
+        """Convert a list of (match_id, team_id, lineup_info) tuples."""
+        self._store('player_lineups', [(safe_cast(match_id, int), safe_cast(team_id, int)) + PLAYER_LINEUP.row(lineup_info)
+                                       for match_id, team_id, lineup_info in rows])
 
+    @dimension('players', lambda player_info: get_nested(player_info, 'id'))
     def convert_player_ref(self, player_info):
         """
         sc_player_id INTEGER PRIMARY KEY,
@@ -1022,13 +1183,7 @@ class DfConverter(Converter):
         birth_date DATE,
         height FLOAT
         """
-        temp = {}
-        temp['full_name'] = get_nested(player_info, 'name')
-        temp['sc_player_id'] = safe_cast(get_nested(player_info, 'id'), int)
-        temp['slug'] = get_nested(player_info, 'slug')
-        temp['short_name'] = get_nested(player_info, 'shortName')
-
-        self._players_df = self._players_df.append(temp, ignore_index=True)
+        return PLAYER(player_info)
 
     def convert_player_stats(self, match_id, player_id, stat_info):
         """
@@ -1042,72 +1197,17 @@ class DfConverter(Converter):
         FOREIGN KEY (match_id) REFERENCES Matches,
         FOREIGN KEY (sc_player_id) REFERENCES Players_ref
         """
-        def parse_value(d, keys):
-            for key in listify(keys):
-                name_val_pair = d.get(key)
-                if name_val_pair is None:
-                    continue
-                if 'raw' in name_val_pair.keys():
-                    return safe_cast(name_val_pair['raw'], int)
-                name, val = name_val_pair.values()
-                val = re.findall(r'\d+', val)
-                if len(val) == 0:
-                    continue
-                return safe_cast(val[0], int)
-            return ""
+        self.convert_player_stats_batch([(match_id, player_id, stat_info)])
 
-        def parse_statistics(stat_dict):
-            # normal player
-            stats = {}
-            try:
-                gr = stat_dict['groups']
-
-                # Summary
-                stats['goalAssist'] = parse_value(get_nested(gr, 'summary', 'items'), 'goalAssist')
-                stats['goals'] = parse_value(get_nested(gr, 'summary', 'items'), 'goals')
-                stats['minutesPlayed'] = parse_value(get_nested(gr, 'summary', 'items'), 'minutesPlayed')
-                # Attack
-                stats['shotsBlocked'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsBlocked')
-                stats['shotsOffTarget'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsOffTarget')
-                stats['shotsOnTarget'] = parse_value(get_nested(gr, 'attack', 'items'), 'shotsOnTarget')
-                stats['totalContest'] = parse_value(get_nested(gr, 'attack', 'items'), 'totalContest')
-                # Defence
-                stats['challengeLost'] = parse_value(get_nested(gr, 'defence', 'items'), 'challengeLost')
-                stats['interceptionWon'] = parse_value(get_nested(gr, 'defence', 'items'), ['interceptionWon', 'interceptionWin'])
-                stats['outfielderBlock'] = parse_value(get_nested(gr, 'defence', 'items'), 'outfielderBlock')
-                stats['totalClearance'] = parse_value(get_nested(gr, 'defence', 'items'), 'totalClearance')
-                stats['totalTackle'] = parse_value(get_nested(gr, 'defence', 'items'), ['wonTackel', 'totalTackle'])
-                # Duels
-                stats['dispossessed'] = parse_value(get_nested(gr, 'duels', 'items'), 'dispossessed')
-                stats['fouls'] = parse_value(get_nested(gr, 'duels', 'items'), 'fouls')
-                stats['totalDuels'] = parse_value(get_nested(gr, 'duels', 'items'), ['totalDuels', 'groundDuels'])
-                stats['wasFouled'] = parse_value(get_nested(gr, 'duels', 'items'), 'wasFouled')
-                # Passing
-                stats['accuratePass'] = parse_value(get_nested(gr, 'passing', 'items'), 'accuratePass')
-                stats['keyPass'] = parse_value(get_nested(gr, 'passing', 'items'), 'keyPass')
-                stats['totalCross'] = parse_value(get_nested(gr, 'passing', 'items'), 'totalCross')
-                stats['totalLongBalls'] = parse_value(get_nested(gr, 'passing', 'items'), 'totalLongBalls')
-
-                if len(gr) == 6:
-                    # goalkeeper
-                    stats['goodHighClaim'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'goodHighClaim')
-                    stats['punches'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'punches')
-                    stats['runsOut'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'runsOut')
-                    stats['saves'] = parse_value(get_nested(gr, 'goalkeeper', 'items'), 'saves')
-            except KeyError:
-                pass
-
-            return stats
-
-        stat = parse_statistics(stat_info)
-
-        temp = {}
-        temp['sc_player_id'] = safe_cast(player_id, int)
-        temp['match_id'] = match_id
-        temp = { **temp, **stat }
-
-        self._player_stats_df = self._player_stats_df.append(temp, ignore_index=True)
+    def convert_player_stats_batch(self, rows):
+        """Convert a list of (match_id, player_id, stat_info) tuples."""
+        self.put(convert_chunk('player_stats', rows))
+
+    def player_stats(self):
+        """Return the player statistics, one fixed width numeric record per player and match."""
+        return self._table('player_stats')
 
+    @dimension('stadiums', lambda event_info: get_nested(event_info, 'event', 'venue', 'id'))
     def convert_stadium_ref(self, event_info):
         """
         stadium_id INTEGER PRIMARY KEY,
@@ -1116,12 +1216,4 @@ class DfConverter(Converter):
         name VARCHAR(50),
         capacity INTEGER
         """
-        temp = {}
-        temp['stadium_id'] = safe_cast(get_nested(event_info, 'event', 'venue', 'id'), int)
-        temp['country'] = get_nested(event_info, 'event', 'venue', 'country', 'name')
-        temp['city'] = get_nested(event_info, 'event', 'venue', 'city', 'name')
-        temp['name'] = get_nested(event_info, 'event', 'venue', 'stadium', 'name')
-        capcity = get_nested(event_info, 'event', 'venue', 'stadium', 'capacity')
-        temp['capacity'] = safe_cast(capcity, int)
-
-        self._stadiums_df = self._stadiums_df.append(temp, ignore_index=True)
+        return STADIUM(event_info)
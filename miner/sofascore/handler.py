@@ -1,6 +1,9 @@
 # Common Python library imports
 import traceback
+from threading import Lock
+from contextlib import contextmanager
 from concurrent.futures import ThreadPoolExecutor as TPE
+from concurrent.futures import ProcessPoolExecutor as PPE
 from multiprocessing import cpu_count
 
 # Pip package imports
@@ -9,8 +12,9 @@ from loguru import logger
 
 # Internal package imports
 from miner.sofascore.scrapper import SofaRequests
+from miner.sofascore.converters import convert_chunk
 from miner.core import IHandler, Converter
-from miner.utils import get_nested, date_interval, listify
+from miner.utils import get_nested, date_interval, listify, concat_frames
 
 __all__ = ["SofaHandler", "get_default_converter"]
 
@@ -51,7 +55,10 @@ class SofaHandler(IHandler):
             "ligue-1": 34
         },
         'multithreading': False,
-        'num_of_threads': cpu_count()
+        'num_of_threads': cpu_count(),
+        # Number of processes converting the statistics, odds and player statistics. 0 converts them in place.
+        'num_of_processes': 0,
+        'chunk_size': 64
     }
 
 
@@ -69,15 +76,60 @@ class SofaHandler(IHandler):
 
         # Create the singleton Sofa requester
         self._req = SofaRequests(headers=self._get_config('headers'))
+        self._process_pool = None
+        self._process_pool_users = 0
+        self._process_pool_lock = Lock()
+
+    def _get_process_pool(self):
+        processes = self._get_config('num_of_processes')
+        if not processes:
+            return None
+        # The tournament threads share one pool, only the first one creates it
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = PPE(max_workers=processes)
+            return self._process_pool
+
+    @contextmanager
+    def _process_pool_scope(self):
+        """The process pool lives while any fetch is running, the last one to finish shuts it down."""
+        with self._process_pool_lock:
+            self._process_pool_users += 1
+        try:
+            yield
+        finally:
+            with self._process_pool_lock:
+                self._process_pool_users -= 1
+                pool = self._process_pool if self._process_pool_users == 0 else None
+                if pool is not None:
+                    self._process_pool = None
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def _convert_chunks(self, q, table, rows):
+        """Convert the raw payloads of the table in the process pool, and put the chunks into the converter."""
+        size = self._get_config('chunk_size')
+        chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+        for chunk in self._get_process_pool().map(convert_chunk, [table] * len(chunks), chunks):
+            q.put(chunk)
 
     def fetch_matches(self, event_ids, **kwargs):
         event_ids = listify(event_ids)
-        q = kwargs.get('converter', self._converter())
+        q = kwargs.get('converter', None)
+        if q is None:
+            # The converter is owned by this call, finalize it when done
+            with self._process_pool_scope(), self._make_converter() as q:
+                return self.fetch_matches(event_ids, converter=q)
         try:
             # logger.info("Tournament: \'%s\' has %s number of events" % (tr_name, len(event_ids)))
             event_info = map(lambda x: self._req.parse_event(x), event_ids)
             lineups_info = map(lambda x: self._req.parse_lineups_event(x), event_ids)
             player_ids = list()
+            # The fact rows are collected, and converted in batches
+            matches = list()
+            odds = list()
+            team_lineups = list()
+            player_lineups = list()
             try:
                 for event, lineup in zip(event_info, lineups_info):
                     # Update the tournamens and season database
@@ -98,21 +150,18 @@ class SofaHandler(IHandler):
                     q.convert_stadium_ref(event)
                     # Convert the referee data
                     q.convert_referee(event)
-                    # Convert the match event
-                    q.convert_match(event, get_nested(event, 'event', 'tournament', 'uniqueId'))
+                    # Collect the match event
+                    matches.append(event)
                     # Get the odds data
                     odds_json = self._req.parse_match_odds(get_nested(event, 'event', 'id'))
-                    # Convert the odds
-                    q.convert_match_odds(get_nested(event, 'event', 'id'), odds_json)
-                    # Convert match statistics
-                    q.convert_match_statistic(event)
+                    odds.append((get_nested(event, 'event', 'id'), odds_json))
                     # Convert players
                     players = home + away
                     for pl in players:
                         # Convert the player references
                         q.convert_player_ref(pl)
                         player_ids.append((event['event']['id'], pl['id']))
-                    # Convert team lineup
+                    # Collect the team lineups
                     try:
                         match_id = event['event']['id']
                         home_id = event['event']['homeTeam']['id']
@@ -125,12 +174,9 @@ class SofaHandler(IHandler):
                         for team_id, team_lineup in team_lineup:
                             # Convert manager
                             q.convert_manager(team_lineup)
-                            # Convert team lineup
-                            q.convert_team_lineup(match_id, team_id, team_lineup)
+                            team_lineups.append((match_id, team_id, team_lineup))
                             try:
-                                for lineup_element in team_lineup['lineupsSorted']:
-                                    # Convert the player lineups
-                                    q.convert_player_lineup(match_id, team_id, lineup_element)
+                                player_lineups.extend((match_id, team_id, lineup_element) for lineup_element in team_lineup['lineupsSorted'])
                             except KeyError:
                                 continue
 
@@ -141,6 +187,17 @@ class SofaHandler(IHandler):
                 tb = traceback.format_exc()
                 logger.error(tb)
 
+            # Convert the match events, odds, statistics and lineups
+            q.convert_matches(matches)
+            if self._get_process_pool() is not None:
+                self._convert_chunks(q, 'odds', odds)
+                self._convert_chunks(q, 'match_stats', matches)
+            else:
+                q.convert_match_odds_batch(odds)
+                q.convert_match_statistics(matches)
+            q.convert_team_lineups(team_lineups)
+            q.convert_player_lineups(player_lineups)
+
             # logger.info("Tournament: \'%s\' has %s number of players" % (tr_name, len(player_ids)))
 
             # player_id_gen = split_into(player_ids, cpu_count() * 5)
@@ -148,15 +205,20 @@ class SofaHandler(IHandler):
                 # player_stats_getter = create_worker(SofaScore.parse_player_stat)
                 player_stats = worker_pool.map(lambda x: self._req.parse_player_stat(x), player_ids)
 
+            stat_rows = list()
             for player in player_stats:
                 try:
                     match_id = player['eventData']['id']
                     player_id = player['player']['id']
                 except (KeyError, TypeError) as err:
                     continue
+                stat_rows.append((match_id, player_id, player))
 
-                # Convert the player statistics
-                q.convert_player_stats(match_id, player_id, player)
+            # Convert the player statistics
+            if self._get_process_pool() is not None:
+                self._convert_chunks(q, 'player_stats', stat_rows)
+            else:
+                q.convert_player_stats_batch(stat_rows)
 
         except Exception as err:
             tb = traceback.format_exc()
@@ -191,43 +253,54 @@ class SofaHandler(IHandler):
         tr_name = get_nested(tr, 'tournament', 'name', default="Unknown")
         curr_date = kwargs.get('date', "")
 
-        q = self._converter(name=tr_name + '-' + str(curr_date))
-        try:
-            events = tr['events']
-            event_ids = list()
-            for event in events:
-                try:
-                    event_ids.append(event['id'])
-                except KeyError:
-                    continue
+        with self._make_converter(name=tr_name + '-' + str(curr_date)) as q:
+            try:
+                events = tr['events']
+                event_ids = list()
+                for event in events:
+                    try:
+                        event_ids.append(event['id'])
+                    except KeyError:
+                        continue
 
-            return self.fetch_matches(event_ids, converter=q)
-        except Exception as err:
-            tb = traceback.format_exc()
-            logger.error(tb)
-            return pd.DataFrame(), pd.DataFrame()
-            # continue
+                return self.fetch_matches(event_ids, converter=q)
+            except Exception as err:
+                tb = traceback.format_exc()
+                logger.error(tb)
+                return pd.DataFrame(), pd.DataFrame()
+                # continue
 
-    def _fetch_date(self, curr_date, *args, **kwargs):
+    def _fetch_tournaments(self, curr_date, *args, **kwargs):
+        """Return the (matches, player_stats) frames of every tournament of the date."""
         tournaments = self._get_tournaments(curr_date)
 
         self.info("Fetching %s tournament from date %s" %  (len(tournaments), curr_date))
         if self._get_config('multithreading'):
             threads = self._get_config('num_of_threads')
             with TPE(max_workers=threads) as pool:
-                lst = pool.map(lambda x: self._fetch_tournament(x, date=curr_date, *args, **kwargs), tournaments)
-            matches, player_stats = list(map(list, zip(*lst)))            
-            return pd.concat(matches), pd.concat(player_stats)
-
+                return list(pool.map(lambda x: self._fetch_tournament(x, date=curr_date, *args, **kwargs), tournaments))
         else:
-            lst = list(map(lambda x: self._fetch_tournament(x, date=curr_date, *args, **kwargs), tournaments))
-            matches, player_stats = list(map(list, zip(*lst)))
-            return pd.concat(matches), pd.concat(player_stats)
+            return list(map(lambda x: self._fetch_tournament(x, date=curr_date, *args, **kwargs), tournaments))
+
+    @staticmethod
+    def _concat_results(lst):
+        if not all(isinstance(res, tuple) and len(res) == 2 for res in lst):
+            # The SQL converters return their database, not frames
+            if all(isinstance(res, str) for res in lst) and len(set(lst)) == 1:
+                return lst[0]
+            return lst
+        # The columns differ per tournament, the union schema is assembled once
+        matches = [matches for matches, _ in lst]
+        player_stats = [player_stats for _, player_stats in lst]
+        return concat_frames(matches), concat_frames(player_stats)
 
+    def _fetch_date(self, curr_date, *args, **kwargs):
+        with self._process_pool_scope():
+            return self._concat_results(self._fetch_tournaments(curr_date, *args, **kwargs))
 
     def _do_fetch(self, start_date, end_date, *args, **kwargs):
         lst = []
-        for curr_date in date_interval(start_date, end_date):
-            lst.append(self._fetch_date(curr_date, **kwargs))
-        matches, player_stats = list(map(list, zip(*lst)))
-        return pd.concat(matches), pd.concat(player_stats)
\ No newline at end of file
+        with self._process_pool_scope():
+            for curr_date in date_interval(start_date, end_date):
+                lst.extend(self._fetch_tournaments(curr_date, **kwargs))
+        return self._concat_results(lst)
\ No newline at end of file
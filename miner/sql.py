@@ -0,0 +1,560 @@
+# Common Python library imports
+import json
+import sqlite3
+from datetime import date
+from queue import Queue
+from threading import Lock, Thread
+
+# Pip package imports
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pypika import Table, Parameter, JSON
+from pypika.terms import Tuple
+from pypika.dialects import PostgreSQLQuery, SQLLiteQuery
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_DATABASE = 'miner.sqlite'
+# Seconds a SQLite writer waits for the write lock of the database
+SQLITE_TIMEOUT = 30
+# Number of batches waiting for the background writer
+DEFAULT_QUEUE_SIZE = 8
+# Values of these column types are stored as JSON text
+JSON_TYPES = ('JSON', 'JSONB', 'BLOB')
+# Columns indexed in the embedded database, unless they lead the primary key
+INDEXED_COLUMNS = ('match_id', 'sc_player_id', 'fifa_player_id')
+
+
+def _split_ddl(ddl):
+    # Split on the commas which are not inside of parentheses, e.g. VARCHAR(50) or PRIMARY KEY (a, b)
+    items, depth, item = [], 0, ''
+    for char in ddl:
+        if char == ',' and depth == 0:
+            items.append(item)
+            item = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        item += char
+    items.append(item)
+    return [item.strip() for item in items if item.strip()]
+
+
+class TableSchema(object):
+    """Columns and primary key of a table written by the SQL converters.
+    The definition is the column list of a CREATE TABLE statement, the same as the docstrings of the converter methods:
+
+        TableSchema('teams', "team_id INTEGER PRIMARY KEY, team_name VARCHAR(100)")
+
+    Rows of a table with a primary key are upserted: the existing rows are kept (ON CONFLICT DO NOTHING), or the
+    columns listed in update are overwritten (ON CONFLICT DO UPDATE).
+    """
+
+    def __init__(self, name, ddl, table=None, update=None):
+        self.name = name
+        self.update = list(update) if update is not None else None
+        self.columns = []
+        self.types = []
+        self.key = ()
+        for item in _split_ddl(ddl):
+            upper = item.upper()
+            if upper.startswith('PRIMARY KEY'):
+                self.key = tuple(column.strip() for column in item[item.index('(') + 1:item.rindex(')')].split(','))
+            elif upper.startswith('FOREIGN KEY'):
+                continue
+            else:
+                column, type = item.split(None, 1)
+                if 'PRIMARY KEY' in type.upper():
+                    self.key = (column,)
+                    type = type[:type.upper().index('PRIMARY KEY')].strip()
+                self.columns.append(column)
+                self.types.append(type)
+        self.table = table if table is not None else Table(name)
+        self._key_index = [self.columns.index(column) for column in self.key]
+        self.json_index = [idx for idx, type in enumerate(self.types) if type.upper() in JSON_TYPES]
+        self._templates = {}
+
+    def row_key(self, row):
+        return tuple(row[idx] for idx in self._key_index)
+
+    def dedup(self, rows):
+        """Remove the rows with the same primary key. The first row is kept, or the last one if the row is updated."""
+        if len(self.key) == 0:
+            return rows
+        unique = {}
+        for row in rows:
+            key = self.row_key(row)
+            if self.update is not None or key not in unique:
+                unique[key] = row
+        return list(unique.values())
+
+    def on_conflict(self, query):
+        """Add the upsert clause of the table to the pypika insert query."""
+        if len(self.key) == 0:
+            return query
+        query = query.on_conflict(*self.key)
+        if not self.update:
+            return query.do_nothing()
+        for column in self.update:
+            query = query.do_update(column)
+        return query
+
+    def insert_sql(self, paramstyle='%s', query=PostgreSQLQuery):
+        """Return the parameterized upsert statement of the table. It is built only once per parameter style."""
+        try:
+            return self._templates[(paramstyle, query)]
+        except KeyError:
+            parameters = [Parameter(paramstyle)] * len(self.columns)
+            template = str(self.on_conflict(query.into(self.table).insert(*parameters)))
+            self._templates[(paramstyle, query)] = template
+            return template
+
+    statement = insert_sql
+
+    def render(self, query, rows, table=None):
+        """Render the rows into a single multi-row upsert statement with inline values."""
+        rows = [_wrap_json(row, self.json_index) for row in rows] if len(self.json_index) > 0 else rows
+        return str(self.on_conflict(query.into(table if table is not None else self.table).insert(*rows)))
+
+    def create_sql(self):
+        """Return the CREATE TABLE statement of the table for SQLite, the array columns are stored as JSON text."""
+        columns = ['"%s" %s' % (column, type.replace('[]', '').strip()) for column, type in zip(self.columns, self.types)]
+        if len(self.key) > 0:
+            columns.append('PRIMARY KEY (%s)' % ', '.join('"%s"' % column for column in self.key))
+        return 'CREATE TABLE IF NOT EXISTS "%s" (%s)' % (self.name, ', '.join(columns))
+
+    def index_sql(self):
+        """Return the CREATE INDEX statements of the match and player id columns for SQLite."""
+        return ['CREATE INDEX IF NOT EXISTS "%s_%s_idx" ON "%s" ("%s")' % (self.name, column, self.name, column)
+                for column in self.columns if column in INDEXED_COLUMNS and self.key[:1] != (column,)]
+
+    def __repr__(self):
+        return "TableSchema(%r, %s columns)" % (self.name, len(self.columns))
+
+
+class TableUpdate(object):
+    """Batched UPDATE of some columns of a table. The rows are (values of the columns..., values of the key...).
+
+    :param schema: TableSchema of the updated table
+    :param columns: the updated columns
+    :param key: the columns identifying the updated rows, the primary key of the table by default
+    """
+
+    def __init__(self, schema, columns, key=None):
+        self.schema = schema
+        self.table = schema.table
+        self.columns = list(columns)
+        self.key = tuple(key) if key is not None else schema.key
+        self.name = '%s(%s)' % (schema.name, ', '.join(self.columns))
+        self.types = [schema.types[schema.columns.index(column)] for column in self.columns + list(self.key)]
+        self.json_index = [idx for idx, type in enumerate(self.types[:len(self.columns)]) if type.upper() in JSON_TYPES]
+        self._templates = {}
+
+    def dedup(self, rows):
+        """Keep the last update of every key."""
+        unique = {}
+        for row in rows:
+            unique[tuple(row[len(self.columns):])] = row
+        return list(unique.values())
+
+    def update_sql(self, paramstyle='%s', query=PostgreSQLQuery):
+        """Return the parameterized UPDATE statement. It is built only once per parameter style."""
+        try:
+            return self._templates[(paramstyle, query)]
+        except KeyError:
+            update = query.update(self.table)
+            for column in self.columns:
+                update = update.set(column, Parameter(paramstyle))
+            for column in self.key:
+                update = update.where(self.table.field(column) == Parameter(paramstyle))
+            template = str(update)
+            self._templates[(paramstyle, query)] = template
+            return template
+
+    statement = update_sql
+
+    def render(self, query, rows, table=None):
+        """Render the rows into a single set-based statement, the values are joined to the table by the key:
+
+            WITH "v"("fd_odds","match_id") AS (VALUES (...),(...))
+            UPDATE "odds" SET "fd_odds"=CAST("v"."fd_odds" AS JSON) FROM "v"
+            WHERE "odds"."match_id"=CAST("v"."match_id" AS INTEGER)
+
+        The values are cast to the types of the columns for PostgreSQL, the untyped literals (e.g. NULL) would be
+        text otherwise. With SQLLiteQuery (SQLite 3.33+) the values are not cast: CAST(... AS JSON) or AS DATE would
+        give them NUMERIC affinity there, and the stored JSON text or date would become a number.
+        """
+        table = (table if table is not None else self.table).get_sql(quote_char='"')
+        names = self.columns + list(self.key)
+        casts = ['JSON' if type.upper() in JSON_TYPES else type for type in self.types]
+        values = ','.join(Tuple(*_wrap_json(row, self.json_index)).get_sql(quote_char='"', secondary_quote_char="'")
+                          for row in rows)
+        if issubclass(query, SQLLiteQuery):
+            column = lambda name, cast: '"v"."%s"' % name
+        else:
+            column = lambda name, cast: 'CAST("v"."%s" AS %s)' % (name, cast)
+        return 'WITH "v"(%s) AS (VALUES %s) UPDATE %s SET %s FROM "v" WHERE %s' % (
+            ','.join('"%s"' % name for name in names),
+            values,
+            table,
+            ','.join('"%s"=%s' % (name, column(name, cast)) for name, cast in zip(self.columns, casts)),
+            ' AND '.join('%s."%s"=%s' % (table, name, column(name, cast))
+                         for name, cast in zip(self.key, casts[len(self.columns):])))
+
+    def __repr__(self):
+        return "TableUpdate(%r)" % self.name
+
+
+def _wrap_json(row, json_index):
+    row = list(row)
+    for idx in json_index:
+        if row[idx] is not None:
+            row[idx] = JSON(row[idx])
+    return tuple(row)
+
+
+class StatementWriter(object):
+    """Render every batch into a single statement with inline values, and pass it to the sink, e.g. InsertQueue.put.
+    It is meant for the sinks which take SQL strings only. The statements are not parameterized, so the values are
+    rendered for every batch, use the ExecutemanyWriter with a DB-API connection to send parameters.
+
+    :param tables: pypika tables to render into by the table name, e.g. the tables of the database schema
+    """
+
+    def __init__(self, sink, query=PostgreSQLQuery, tables=None):
+        self._sink = sink
+        self._query = query
+        self._tables = tables if tables is not None else {}
+
+    def write(self, schema, rows):
+        self._sink(schema.render(self._query, rows, self._tables.get(schema.name, None)))
+
+    def flush(self):
+        pass
+
+
+class ExecutemanyWriter(object):
+    """Write every batch with executemany() of the cached statement template of the table, on a DB-API connection.
+
+    :param connection: DB-API connection, e.g. of psycopg2 or sqlite3
+    :param paramstyle: placeholder of the driver, '%s' for psycopg2 and '?' for sqlite3
+    """
+
+    def __init__(self, connection, paramstyle='%s', query=PostgreSQLQuery):
+        self._conn = connection
+        self._paramstyle = paramstyle
+        self._query = query
+
+    def adapt(self, schema, row):
+        """Convert the values of the row to the types accepted by the driver."""
+        if len(schema.json_index) == 0:
+            return row
+        row = list(row)
+        for idx in schema.json_index:
+            if row[idx] is not None:
+                row[idx] = json.dumps(row[idx])
+        return tuple(row)
+
+    def write(self, schema, rows):
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(schema.statement(self._paramstyle, self._query), [self.adapt(schema, row) for row in rows])
+        finally:
+            cursor.close()
+
+    def flush(self):
+        self._conn.commit()
+
+
+class SqliteWriter(ExecutemanyWriter):
+    """ExecutemanyWriter of a sqlite3 connection. Arrays are stored as JSON text, timestamps in ISO format."""
+
+    def __init__(self, connection, query=PostgreSQLQuery):
+        super(SqliteWriter, self).__init__(connection, paramstyle='?', query=query)
+
+    def write(self, schema, rows):
+        super(SqliteWriter, self).write(schema, rows)
+        # SQLite has a single writer per database, the write lock is released after every batch, so the
+        # converters of a run writing the same file do not wait for each other to finish
+        self._conn.commit()
+
+    def adapt(self, schema, row):
+        return tuple(self._adapt_value(value) for value in super(SqliteWriter, self).adapt(schema, row))
+
+    @staticmethod
+    def _adapt_value(value):
+        if isinstance(value, (list, tuple)):
+            return json.dumps(value)
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+
+class BackgroundWriter(object):
+    """Write the batches of the wrapped writer in a background thread, fed by a bounded queue.
+
+    write() returns as soon as the batch is queued, so the conversion goes on while the database writes. When the
+    queue is full write() blocks, and the fetchers are slowed down to the pace of the database. The thread is
+    started by the first write, and stopped by close(). The first error of the thread is raised again by the next
+    write(), flush() or close().
+
+    :param writer: the wrapped StatementWriter or ExecutemanyWriter
+    :param maxsize: number of batches waiting in the queue
+    """
+
+    _STOP = object()
+
+    def __init__(self, writer, maxsize=DEFAULT_QUEUE_SIZE):
+        self._writer = writer
+        self._queue = Queue(maxsize)
+        self._thread = None
+        self._lock = Lock()
+        self._error = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='BackgroundWriter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                self._writer.write(*item)
+            except Exception as err:
+                logger.error(err)
+                # The batch is lost, the caller gets the error on its next call
+                if self._error is None:
+                    self._error = err
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, schema, rows):
+        self._raise_error()
+        self._start()
+        self._queue.put((schema, rows))
+
+    def flush(self):
+        """Wait until every queued batch is written, then flush the wrapped writer."""
+        self._queue.join()
+        self._raise_error()
+        self._writer.flush()
+
+    def close(self):
+        """Write the queued batches and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+        self._raise_error()
+
+
+def connect_sqlite(database=DEFAULT_DATABASE, tables=()):
+    """Open the embedded database of the converters in WAL mode, and create the missing tables and indexes.
+    The connection can be used from the worker threads of a converter, its writes are serialized by the BulkInsert
+    of the converter. The converters of a run have their own connections, SqliteWriter commits every batch, and a
+    writer waits up to SQLITE_TIMEOUT seconds for the batch of an other one.
+    """
+    conn = sqlite3.connect(database, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    for schema in tables:
+        conn.execute(schema.create_sql())
+        for statement in schema.index_sql():
+            conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def query_sqlite(database, sql, params=(), parse_dates=None):
+    """Read the result of a query from the embedded database as a DataFrame.
+    Every call opens its own connection, so the handlers can query from any worker thread.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        return pd.read_sql_query(sql, conn, params=params, parse_dates=parse_dates)
+    finally:
+        conn.close()
+
+
+class BulkInsert(object):
+    """Accumulate the rows per table, and write them in batches of batch_size rows.
+
+    :param writer: StatementWriter (multi-row INSERT statements) or ExecutemanyWriter (parameterized statements),
+    optionally wrapped in a BackgroundWriter
+    :param batch_size: number of rows per batch
+    :param tables: the write order of the tables, the referenced tables first. Every pending batch is written
+    in this order, so the rows of a table never reach the database before the rows they refer to.
+
+    The rows of a batch are deduplicated by the primary key before they are written, and the statements are upserts.
+    """
+
+    def __init__(self, writer, batch_size=DEFAULT_BATCH_SIZE, tables=()):
+        self._writer = writer
+        self._batch_size = batch_size
+        self._lock = Lock()
+        self._order = [schema.name for schema in tables]
+        self._batches = {}
+
+    def add(self, schema, row):
+        self.extend(schema, [row])
+
+    def extend(self, schema, rows):
+        with self._lock:
+            if schema.name not in self._batches:
+                self._batches[schema.name] = (schema, [])
+                if schema.name not in self._order:
+                    self._order.append(schema.name)
+            batch = self._batches[schema.name][1]
+            batch.extend(rows)
+            if len(batch) >= self._batch_size:
+                self._write_all()
+
+    def flush(self):
+        """Write every pending row."""
+        with self._lock:
+            self._write_all()
+            self._writer.flush()
+
+    def _write_all(self):
+        for name in self._order:
+            if name not in self._batches:
+                continue
+            schema, rows = self._batches.pop(name)
+            rows = schema.dedup(rows)
+            for start in range(0, len(rows), self._batch_size):
+                self._write(schema, rows[start:start + self._batch_size])
+
+    def _write(self, schema, rows):
+        if len(rows) == 0:
+            return
+        self._writer.write(schema, rows)
+
+
+# Tables of the sc_soccer database written by the SQL converters, the column order is the order of the inserted values.
+# The dimensions are inserted once, the facts scraped again overwrite their sofascore columns.
+TOURNAMENTS_TABLE = TableSchema('tournaments', """
+    tournament_id INTEGER PRIMARY KEY,
+    tournament_name VARCHAR(100),
+    tournament_short VARCHAR(50)
+    """)
+
+SEASONS_TABLE = TableSchema('seasons', """
+    season_id INTEGER PRIMARY KEY,
+    season_year VARCHAR(20),
+    season_name VARCHAR(50),
+    season_slug VARCHAR(50)
+    """)
+
+TEAMS_TABLE = TableSchema('teams', """
+    team_id INTEGER PRIMARY KEY,
+    team_name VARCHAR(100),
+    team_slug VARCHAR(50),
+    team_short VARCHAR(50)
+    """)
+
+REFEREES_TABLE = TableSchema('referees', """
+    referee_id INTEGER PRIMARY KEY,
+    referee_name VARCHAR(50),
+    yellow_card_per_game FLOAT,
+    red_card_per_game FLOAT
+    """)
+
+STADIUMS_TABLE = TableSchema('stadiums', """
+    stadium_id INTEGER PRIMARY KEY,
+    country VARCHAR(50),
+    city VARCHAR(50),
+    name VARCHAR(50),
+    capacity INTEGER
+    """)
+
+MANAGERS_TABLE = TableSchema('managers', """
+    manager_id INTEGER PRIMARY KEY,
+    manager_name VARCHAR(50)
+    """)
+
+PLAYERS_TABLE = TableSchema('players', """
+    sc_player_id INTEGER PRIMARY KEY,
+    fifa_player_id INTEGER,
+    full_name VARCHAR(100),
+    slug VARCHAR(50),
+    short_name VARCHAR(50),
+    birth_date DATE,
+    height FLOAT
+    """)
+
+MATCHES_TABLE = TableSchema('matches', """
+    match_id INTEGER PRIMARY KEY,
+    tournament_id INTEGER,
+    season_id INTEGER,
+    match_date DATE,
+    full_date TIMESTAMP,
+    match_status VARCHAR(50),
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    referee_id INTEGER,
+    stadium_id INTEGER
+    """, update=['tournament_id', 'season_id', 'match_date', 'full_date', 'match_status',
+                 'home_team_id', 'away_team_id', 'referee_id', 'stadium_id'])
+
+ODDS_TABLE = TableSchema('odds', """
+    match_id INTEGER,
+    sc_odds JSON,
+    fd_odds JSON
+    """)
+
+STATISTICS_TABLE = TableSchema('statistics', """
+    match_id INTEGER PRIMARY KEY,
+    sc_statistics JSON,
+    fd_statistics JSON,
+    sc_forms JSON,
+    sc_votes JSON,
+    sc_manager_duels JSON,
+    sc_h2h JSON,
+    home_score FLOAT,
+    away_score FLOAT
+    """, update=['sc_statistics', 'sc_forms', 'sc_votes', 'sc_manager_duels', 'sc_h2h',
+                 'home_score', 'away_score'])
+
+LINEUPS_TABLE = TableSchema('lineups', """
+    match_id INTEGER,
+    team_id INTEGER,
+    formation TEXT [],
+    manager_id INTEGER
+    """)
+
+PLAYER_LINEUPS_TABLE = TableSchema('player_lineups', """
+    match_id INTEGER,
+    team_id INTEGER,
+    sc_player_id INTEGER,
+    player_position_long VARCHAR(50),
+    player_position_short VARCHAR(20),
+    sc_rating FLOAT,
+    substitute BOOLEAN
+    """)
+
+PLAYERS_STATS_TABLE = TableSchema('players_stats', """
+    sc_player_id integer,
+    match_id integer,
+    sc_stat blob,
+    fifa_stat blob,
+    has_sc_stat boolean,
+    has_fifa_stat boolean,
+    PRIMARY KEY (sc_player_id, match_id),
+    FOREIGN KEY (match_id) REFERENCES Matches,
+    FOREIGN KEY (sc_player_id) REFERENCES Players_ref
+    """, update=['sc_stat', 'has_sc_stat'])
+
+# The referenced tables are written first
+SQL_TABLES = [TOURNAMENTS_TABLE, SEASONS_TABLE, TEAMS_TABLE, REFEREES_TABLE, STADIUMS_TABLE, MANAGERS_TABLE,
+              PLAYERS_TABLE, MATCHES_TABLE, ODDS_TABLE, STATISTICS_TABLE, LINEUPS_TABLE, PLAYER_LINEUPS_TABLE,
+              PLAYERS_STATS_TABLE]
@@ -5,6 +5,8 @@ from functools import wraps
 
 # Pip package imports
 from loguru import logger
+import numpy as np
+import pandas as pd
 
 
 def listify(args):
@@ -85,7 +87,124 @@ def safe_cast(value, type, default=None):
     except Exception as err:
         return default
 
-def date_interval(start, end, delta=1):
+class Extractor(object):
+    """Compiled field extractor for a table declaration.
+
+    The field paths are merged into a tree and turned into a single generated function, so a shared prefix
+    (like 'event') is looked up only once and the whole row is pulled from the payload in one pass, instead of
+    one get_nested call per field.
+
+    :param fields: list of (name, path, cast, default) tuples. The path is a tuple of dictionary keys, the cast
+        (None means no cast) and the default (None by default) are optional. A failed cast results in the default.
+    """
+
+    def __init__(self, fields):
+        self.names = []
+        tree = {}
+        namespace = {}
+        for idx, field in enumerate(fields):
+            name, path, cast, default = (tuple(field) + (None, None))[:4]
+            self.names.append(name)
+            namespace['c%d' % idx] = cast
+            namespace['d%d' % idx] = default
+            node = tree
+            for key in path:
+                node = node.setdefault(key, {})
+            # The field indices are stored next to the children of the last key
+            node.setdefault(None, []).append(idx)
+
+        lines = ["def extract(n0):"]
+        self._compile_node(tree, 'n0', lines, [0])
+        for idx in range(len(fields)):
+            if namespace['c%d' % idx] is not None:
+                lines.append("    if f%d is not None:" % idx)
+                lines.append("        try:")
+                lines.append("            f%d = c%d(f%d)" % (idx, idx, idx))
+                lines.append("        except Exception:")
+                lines.append("            f%d = None" % idx)
+            if namespace['d%d' % idx] is not None:
+                lines.append("    if f%d is None:" % idx)
+                lines.append("        f%d = d%d" % (idx, idx))
+        lines.append("    return (%s)" % "".join("f%d, " % idx for idx in range(len(fields))))
+        exec("\n".join(lines), namespace)
+        self.row = namespace['extract']
+
+    def _compile_node(self, node, var, lines, counter):
+        for key, child in node.items():
+            if key is None:
+                continue
+            counter[0] += 1
+            child_var = 'n%d' % counter[0]
+            lines.append("    %s = %s.get(%r) if isinstance(%s, dict) else None" % (child_var, var, key, var))
+            for idx in child.get(None, []):
+                lines.append("    f%d = %s" % (idx, child_var))
+            self._compile_node(child, child_var, lines, counter)
+
+    def __call__(self, payload):
+        """Extract a row from the payload as a dictionary."""
+        return dict(zip(self.names, self.row(payload)))
+
+    def columns(self, payloads):
+        """Extract every payload of the list at once, and return the rows as columns."""
+        rows = list(map(self.row, payloads))
+        if len(rows) == 0:
+            return {name: [] for name in self.names}
+        return {name: list(column) for name, column in zip(self.names, zip(*rows))}
+
+
+def _union_dtype(dtypes, missing):
+    if all(isinstance(dtype, np.dtype) and dtype.kind == 'b' for dtype in dtypes):
+        # Booleans can not hold the missing cells either
+        return np.dtype(object) if missing else np.dtype(bool)
+    if all(isinstance(dtype, np.dtype) and dtype.kind in 'iufcmM' for dtype in dtypes):
+        try:
+            dtype = np.result_type(*dtypes)
+        except TypeError:
+            return np.dtype(object)
+        # Integers can not hold the missing cells
+        return np.dtype(np.float64) if missing and dtype.kind in 'iu' else dtype
+    if all(dtype == dtypes[0] for dtype in dtypes) and not isinstance(dtypes[0], np.dtype):
+        # Extension dtypes, like the timezone aware timestamps, are rebuilt after the fill
+        return dtypes[0]
+    return np.dtype(object)
+
+
+def concat_frames(frames):
+    """Concatenate DataFrames with differing columns in a single pass.
+    The union of the columns is computed once, every column is preallocated with the common dtype of its pieces,
+    and filled slice by slice. Cells of the columns missing from a frame are NaN (NaT for timestamps).
+    """
+    frames = [frame for frame in frames if frame is not None and len(frame.columns) > 0]
+    if len(frames) == 0:
+        return pd.DataFrame()
+
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+    offsets = np.cumsum([0] + [len(frame.index) for frame in frames])
+    total = offsets[-1]
+
+    data = {}
+    for column in columns:
+        pieces = [(start, frame[column]) for start, frame in zip(offsets, frames) if column in frame.columns]
+        missing = sum(len(piece.index) for _, piece in pieces) < total
+        dtype = _union_dtype([piece.dtype for _, piece in pieces], missing)
+        if not isinstance(dtype, np.dtype):
+            values = np.full(total, np.nan, dtype=object)
+        elif dtype.kind in 'mM':
+            values = np.full(total, np.datetime64('NaT') if dtype.kind == 'M' else np.timedelta64('NaT'), dtype=dtype)
+        elif dtype.kind in 'fc' or dtype == object:
+            values = np.full(total, np.nan, dtype=dtype)
+        else:
+            values = np.empty(total, dtype=dtype)
+        for start, piece in pieces:
+            # The object columns are filled with boxed values, e.g. the timestamps as Timestamp and not as integer
+            values[start:start + len(piece.index)] = piece.astype(object).to_numpy() if values.dtype == object \
+                else piece.to_numpy()
+        data[column] = values if isinstance(dtype, np.dtype) else pd.array(values, dtype=dtype)
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def date_interval(start, end, delta=1):
     curr = start
     while curr <= end:
         yield curr
@@ -0,0 +1,44 @@
+import miner as m
+
+
+def test_converter_lifecycle_flushes_once():
+    class CountingConverter(m.core.Converter):
+
+        def __init__(self, *args, **kwargs):
+            self.flushed = 0
+            super(CountingConverter, self).__init__(*args, **kwargs)
+
+        def flush(self):
+            self.flushed += 1
+
+    with CountingConverter() as q:
+        assert not q.closed
+    assert q.closed
+    q.close()
+    del q
+
+    q = CountingConverter()
+    q.close()
+    q.close()
+    assert q.flushed == 1
+    # A reopened converter can be finalized again
+    with q.open():
+        pass
+    assert q.flushed == 2
+
+
+def test_row_buffer_merges_the_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    buffer = m.core.RowBuffer()
+
+    def fill(start):
+        for i in range(start, start + 1000):
+            buffer.append('rows', i)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(fill, range(0, 16000, 1000)))
+
+    assert sorted(buffer.rows('rows')) == list(range(16000))
+    assert len(buffer.pop('rows')) == 16000
+    assert buffer.rows('rows') == []
@@ -120,3 +120,53 @@ def test_fifa_handler_fetch():
     handler = m.fifaindex.FifaHandler(config={'multithreading': False}, query=feeder, converter=conv)
     handler.fetch_dates(date(2019,5,5), date(219,5,6))
     assert len(datastore) > 0
+
+def test_fifa_stat_range_update(tmpdir):
+    from miner.sql import connect_sqlite, SQL_TABLES
+    database = str(tmpdir.join('miner.sqlite'))
+    conn = connect_sqlite(database, SQL_TABLES)
+    conn.executemany("INSERT INTO matches (match_id, match_date) VALUES (?, ?)",
+                     [(1, '2019-05-01'), (2, '2019-06-01'), (3, '2019-07-01')])
+    conn.executemany("INSERT INTO players_stats (sc_player_id, match_id) VALUES (?, ?)", [(7, 1), (7, 2), (7, 3), (8, 2)])
+    conn.commit()
+
+    with m.fifaindex.SqliteConverter(database=database) as q:
+        q.update_fifa_stat_range(7, date(2019, 5, 1), date(2019, 8, 1), {'pace': 90})
+
+    assert conn.execute("SELECT sc_player_id, match_id, fifa_stat FROM players_stats ORDER BY sc_player_id, match_id").fetchall() == \
+        [(7, 1, None), (7, 2, '{"pace": 90}'), (7, 3, '{"pace": 90}'), (8, 2, None)]
+
+
+def test_sqlite_query(tmpdir):
+    from miner.sql import connect_sqlite, SQL_TABLES
+    database = str(tmpdir.join('miner.sqlite'))
+    conn = connect_sqlite(database, SQL_TABLES)
+    conn.executemany("INSERT INTO players (sc_player_id, full_name, short_name, birth_date) VALUES (?, ?, ?, ?)",
+                     [(7, "Filippo Falco", "F. Falco", '1992-02-11'), (8, "Alisson", "Alisson", None)])
+    conn.executemany("INSERT INTO matches (match_id, match_date) VALUES (?, ?)",
+                     [(1, '2019-05-01T00:00:00'), (2, '2019-06-01T00:00:00')])
+    conn.executemany("INSERT INTO players_stats (sc_player_id, match_id, fifa_stat) VALUES (?, ?, ?)",
+                     [(7, 1, None), (7, 2, None), (8, 2, '{"pace": 90}')])
+    conn.commit()
+
+    query = m.fifaindex.FifaHandler.SqliteQuery(database=database)
+    players = query.get_null_fifa_stats(None)
+    assert players[['player_id', 'birth', 'name', 'short']].values.tolist() == \
+        [[7, date(1992, 2, 11), "Filippo Falco", "F. Falco"]]
+    matches = query.get_all_match_for_player_id(7)
+    assert matches['date'].tolist() == [pd.Timestamp(2019, 6, 1), pd.Timestamp(2019, 5, 1)]
+
+
+def test_fifa_stat_range_falls_back_to_the_matches():
+    class CustomConverter(m.core.Converter):
+
+        def __init__(self, *args, **kwargs):
+            self.store = []
+            super(CustomConverter, self).__init__(*args, **kwargs)
+
+        def update_fifa_stat(self, player_id, match_id, fifa_stat):
+            self.store.append((player_id, match_id, fifa_stat))
+
+    q = CustomConverter()
+    q.update_fifa_stat_range(7, date(2019, 5, 1), date(2019, 8, 1), {'pace': 90}, match_ids=[2, 3])
+    assert q.store == [(7, 2, {'pace': 90}), (7, 3, {'pace': 90})]
@@ -0,0 +1,234 @@
+import json
+import sqlite3
+from datetime import date
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+import miner as m
+from miner.footballdata import scrapper
+from miner.footballdata.converters import match_odds, match_statistic
+
+CSV = b"Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,B365H\r\nE0,10/08/2018,Man United,Leicester,2,1,1.57\r\n"
+NEW_ROW = b"E0,10/08/2018,Newcastle,Tottenham,1,2,3.4\r\n"
+
+
+class Response(object):
+
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = 'ISO-8859-1'
+        self.headers = headers if headers is not None else {}
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def requester(monkeypatch, tmpdir):
+    calls = []
+
+    def get(url, headers=None, **kwargs):
+        calls.append(headers)
+        if headers.get('If-None-Match') == '"v1"':
+            return Response(304)
+        return Response(200, CSV, {'ETag': '"v1"'})
+
+    monkeypatch.setattr(scrapper.requests, 'get', get)
+    return m.footballdata.FootballDataRequest(cache_dir=str(tmpdir)), calls
+
+
+def test_current_season():
+    assert m.footballdata.FootballDataRequest.is_current_season("19/20", today=date(2020, 3, 1))
+    assert m.footballdata.FootballDataRequest.is_current_season("19/20", today=date(2019, 8, 1))
+    assert not m.footballdata.FootballDataRequest.is_current_season("18/19", today=date(2019, 8, 1))
+    assert not m.footballdata.FootballDataRequest.is_current_season("99/00", today=date(2019, 8, 1))
+    assert m.footballdata.FootballDataRequest.is_current_season("99/00", today=date(2000, 3, 1))
+
+
+def test_finished_season_is_read_from_the_cache(requester, monkeypatch):
+    req, calls = requester
+    df = req.parse_odds("premier-league", "18/19")
+    assert df['HomeTeam'].tolist() == ['Man United']
+    # The same run does not download again
+    req.parse_odds("premier-league", "18/19")
+    assert len(calls) == 1
+
+    # The next run reads the finished season from the disk
+    req.reset()
+    assert req.parse_odds("premier-league", "18/19").equals(df)
+    assert len(calls) == 1
+
+
+def test_current_season_is_revalidated(requester, monkeypatch):
+    req, calls = requester
+    current = "%02d/%02d" % (date.today().year % 100, (date.today().year + 1) % 100)
+    df = req.parse_odds("premier-league", current)
+
+    req.reset()
+    assert req.parse_odds("premier-league", current).equals(df)
+    assert calls == [{}, {'If-None-Match': '"v1"', 'Range': 'bytes=%s-' % CSV.index(b'E0'),
+                          'Accept-Encoding': 'identity'}]
+
+
+def test_current_season_appends_the_new_rows(requester, monkeypatch):
+    req, calls = requester
+    current = "%02d/%02d" % (date.today().year % 100, (date.today().year + 1) % 100)
+    req.parse_odds("premier-league", current)
+
+    def get(url, headers=None, **kwargs):
+        calls.append(headers)
+        start = int(headers['Range'][len('bytes='):-1])
+        return Response(206, (CSV + NEW_ROW)[start:], {'ETag': '"v2"'})
+
+    monkeypatch.setattr(scrapper.requests, 'get', get)
+    req.reset()
+    df = req.parse_odds("premier-league", current)
+    assert df['HomeTeam'].tolist() == ['Man United', 'Newcastle']
+    assert [round(value, 4) for value in df['B365H'].tolist()] == [1.57, 3.4]
+
+    # The next sync starts from the appended row, a new requester reads the same cache
+    req = m.footballdata.FootballDataRequest(cache_dir=req._cache_dir)
+    assert len(req.parse_odds("premier-league", current).index) == 2
+    assert calls[-1]['Range'] == 'bytes=%s-' % len(CSV)
+    assert calls[-1]['Accept-Encoding'] == 'identity'
+
+
+def test_cached_frame_is_kept_when_the_request_times_out(requester, monkeypatch):
+    req, calls = requester
+    current = "%02d/%02d" % (date.today().year % 100, (date.today().year + 1) % 100)
+    df = req.parse_odds("premier-league", current)
+
+    def get(url, headers=None, **kwargs):
+        raise scrapper.Timeout("timed out")
+
+    monkeypatch.setattr(scrapper.requests, 'get', get)
+    monkeypatch.setattr(m.utils.time, 'sleep', lambda seconds: None)
+    req.reset()
+    assert req.parse_odds("premier-league", current).equals(df)
+    req.reset()
+    assert m.footballdata.FootballDataRequest(cache_dir=None).parse_odds("premier-league", current) is None
+
+
+def test_typed_csv_parsing():
+    content = b"Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,HS,Referee,B365H,Bb1X2\r\n" \
+              b"E0,10/08/2018,Man United,Leicester,2,1,8,A Marriner,1.57,39\r\n" \
+              b"E0,11/08/18,Newcastle,Tottenham,1,2,15,M Atkinson,3.4,38\r\n"
+    df = scrapper.read_csv(content)
+
+    assert 'Referee' not in df.columns
+    assert df['Date'].tolist() == [pd.Timestamp(2018, 8, 10), pd.Timestamp(2018, 8, 11)]
+    assert df['B365H'].dtype == np.float32
+    assert match_odds(df.iloc[[0]]) == {'B365H': 1.57, 'Bb1X2': 39}
+    assert match_statistic(df.iloc[[0]]) == (2, 1, {'HS': 8})
+
+
+def test_team_name_index(tmpdir):
+    path = str(tmpdir.join('team-names.json'))
+    fd_names = ['Man United', 'Man City', 'Wolves', 'Tottenham', 'Brighton']
+    teams = [('Man Utd', 'Manchester United'), ('Man City', 'Manchester City'), ('Spurs', 'Tottenham Hotspur'),
+             ('Brighton', 'Brighton & Hove Albion'), ('Wolverhampton', 'Wolverhampton Wanderers')]
+    index = m.footballdata.TeamNameIndex(path=path, aliases={'Wolverhampton': 'Wolves'})
+    names = index.build('premier-league', teams, fd_names)
+    assert names['Manchester United'] == 'Man United'
+    assert names['Man City'] == 'Man City'
+    assert names['Spurs'] == 'Tottenham'
+    assert names['Brighton & Hove Albion'] == 'Brighton'
+    assert names['Wolverhampton Wanderers'] == 'Wolves'
+
+    index.confirm('premier-league', [('Spurs', 'Tottenham'), ('Wolverhampton', 'Wolves')])
+    # The confirmed names are looked up by the next run, even if they are not similar
+    index = m.footballdata.TeamNameIndex(path=path, threshold=1.0)
+    assert index.build('premier-league', [('Spurs', 'Tottenham Hotspur')], fd_names) == \
+        {'Spurs': 'Tottenham', 'Tottenham Hotspur': 'Tottenham'}
+
+
+def test_join_matches():
+    df = pd.DataFrame({'id': [1, 2, 3, 4],
+                       'date': pd.to_datetime(['2018-08-10', '2018-08-11', '2018-08-11', '2018-08-12']),
+                       'home_team_short': ['Man Utd', 'Newcastle', 'Fulham', 'Spurs'],
+                       'home_team': ['Manchester United', 'Newcastle United', 'Fulham FC', 'Tottenham Hotspur'],
+                       'away_team_short': ['Leicester', 'Spurs', 'Palace', 'Wolves'],
+                       'away_team': ['Leicester City', 'Tottenham Hotspur', 'Crystal Palace', 'Wolverhampton']})
+    football_df = pd.DataFrame({'Date': pd.to_datetime(['2018-08-10', '2018-08-11', '2018-08-11']),
+                                'HomeTeam': ['Man United', 'Newcastle', 'Fulham'],
+                                'AwayTeam': ['Leicester', 'Tottenham', 'Crystal Palace']})
+    names = {'Man Utd': 'Man United', 'Leicester': 'Leicester', 'Newcastle': 'Newcastle', 'Spurs': 'Tottenham',
+             'Fulham': 'Fulham'}
+    joined, unjoined = m.footballdata.FootballDataHandler._join_matches(df, football_df, names)
+
+    # The unresolved away team of the third match is joined by the home team
+    assert sorted(zip(joined['id'], joined['row'])) == [(1, 0), (2, 1), (3, 2)]
+    assert unjoined['id'].tolist() == [4]
+
+
+def test_plan_builds_the_non_empty_league_seasons():
+    query_df = pd.DataFrame({'id': [1, 2, 3, 4],
+                             'tournament': ['premier-league', 'premier-league', 'premier-league', 'laliga'],
+                             'season': ['18/19', '19/20', '18/19', '19/20']})
+    units = m.footballdata.FootballDataHandler._plan(query_df)
+
+    # Every season is kept for every league, laliga has no 18/19 unit
+    assert [(tr, season, df['id'].tolist()) for tr, season, df in units] == [
+        ('premier-league', '18/19', [1, 3]), ('premier-league', '19/20', [2]), ('laliga', '19/20', [4])]
+
+
+def test_missing_and_failing_seasons_are_skipped(monkeypatch):
+    def parse_odds(tr, season):
+        if tr == 'laliga':
+            raise ValueError("broken CSV")
+        return None
+
+    handler = m.footballdata.FootballDataHandler(converter=m.core.Converter,
+                                                 config={'cache_dir': None, 'multithreading': False})
+    monkeypatch.setattr(handler._req, 'parse_odds', parse_odds)
+    df = pd.DataFrame({'id': [1], 'date': ['2018-08-10']})
+    units = [(tr, '18/19', df.copy()) for tr in ('premier-league', 'laliga', 'bundesliga')]
+
+    # The season without a CSV is skipped, the failing one does not stop the others
+    assert list(handler._run(units)) == [None, None]
+
+
+def test_iter_fetch_yields_every_season_when_it_is_processed():
+    class Query(object):
+        def get_matches_where_odds_are_null(self, start_date, end_date):
+            return pd.DataFrame({'id': [1, 2], 'tournament': ['premier-league', 'laliga'],
+                                 'season': ['18/19', '18/19']})
+
+    handler = m.footballdata.FootballDataHandler(query=Query(), config={'cache_dir': None, 'multithreading': False})
+    processed = []
+    handler._process = lambda unit: processed.append(unit[0]) or unit[0]
+    results = handler.iter_fetch(start=date(2018, 8, 1), end=date(2018, 8, 31))
+
+    # The next season is processed only when the output of the previous one is taken
+    assert next(results) == 'premier-league'
+    assert processed == ['premier-league']
+    assert list(results) == ['laliga']
+
+
+def test_sqlite_database_without_postgresql(tmpdir, monkeypatch):
+    database = str(tmpdir.join('miner.sqlite'))
+    sofa = m.sofascore.SqliteConverter(database=database)
+    event = {'id': 1, 'season': {'id': 5, 'year': '18/19'}, 'homeTeam': {'id': 10}, 'awayTeam': {'id': 20},
+             'tournament': {'uniqueId': 17, 'slug': 'premier-league'}, 'formatedStartDate': '10.08.2018.',
+             'startTime': '19:00'}
+    sofa.convert_tournaments(event)
+    sofa.convert_season(event['season'])
+    sofa.convert_teams({'id': 10, 'name': 'Manchester United', 'shortName': 'Man Utd'})
+    sofa.convert_teams({'id': 20, 'name': 'Leicester City', 'shortName': 'Leicester'})
+    sofa.convert_matches([{'event': event}])
+    sofa.convert_match_odds(1, {'markets': []})
+    sofa.close()
+
+    query = m.footballdata.FootballDataHandler.SqliteQuery(database=database)
+    converter = partial(m.footballdata.SqliteConverter, database=database)
+    handler = m.footballdata.FootballDataHandler(query=query, converter=converter, config={'cache_dir': None})
+    monkeypatch.setattr(handler._req, 'parse_odds', lambda tr, season: scrapper.read_csv(CSV))
+    handler.fetch_dates(start=date(2018, 8, 1), end=date(2018, 8, 31))
+
+    conn = sqlite3.connect(database)
+    assert json.loads(conn.execute("SELECT fd_odds FROM odds WHERE match_id = 1").fetchone()[0]) == {'B365H': 1.57}
+    # The odds are not fetched again
+    assert len(query.get_matches_where_odds_are_null(date(2018, 8, 1), date(2018, 8, 31)).index) == 0
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 import miner as m
+from miner.sql import StatementWriter
 from datetime import date
 
 test_match_id = 7828232
@@ -61,4 +62,238 @@ def test_fetch_past_date():
 
     handler = m.sofascore.SofaHandler(config={'multithreading': False})
     result, _ = handler.fetch_dates(start=start_date)
-    assert len(result.keys()) == 427
\ No newline at end of file
+    assert len(result.keys()) == 427
+
+def test_dimension_cache_shared_between_converters():
+    cache = m.core.DimensionCache()
+    first = m.sofascore.DfConverter(cache=cache)
+    second = m.sofascore.DfConverter(cache=cache)
+    team = {'id': 44, 'name': "Liverpool", 'slug': "liverpool", 'shortName': "Liverpool"}
+
+    assert first.convert_teams(team) is not None
+    # The same team is not converted again by any converter of the run
+    assert second.convert_teams(team) is None
+    assert second.convert_teams(dict(team, id=35)) is not None
+    assert len(cache.rows('teams')) == 2
+
+
+def test_sql_converters_write_their_own_dimension_rows(tmpdir):
+    cache = m.core.DimensionCache()
+    team = {'id': 44, 'name': "Liverpool", 'slug': "liverpool", 'shortName': "Liverpool"}
+    statements = []
+    for name in ('first', 'second'):
+        q = m.sofascore.SqliteConverter(database=str(tmpdir.join('%s.sqlite' % name)), cache=cache,
+                                        writer=StatementWriter(statements.append))
+        q.convert_teams(team)
+        # A referee without id is not a dimension row
+        q.convert_referee({'event': {}})
+        q.close()
+    # Both converters write the team their facts refer to
+    assert len(statements) == 2
+    assert all(statement.startswith('INSERT INTO "teams"') for statement in statements)
+
+def test_match_dates_converted_from_utc():
+    match_date, full_date = m.sofascore.convert_match_dates(['02.05.2019.', '15.01.2020.', None],
+                                                            ['18:30', '20:00', None], 'Europe/Budapest')
+    assert match_date.iloc[0] == pd.Timestamp(2019, 5, 2)
+    assert str(full_date.iloc[0]) == '2019-05-02 20:30:00+02:00'
+    assert str(full_date.iloc[1]) == '2020-01-15 21:00:00+01:00'
+    assert pd.isnull(full_date.iloc[2])
+
+
+def test_match_odds_matrix():
+    odds = {'markets': [
+        {'marketName': 'Full time', 'choices': [{'name': '1', 'fractionalValue': '6/4'},
+                                                {'name': 'X', 'fractionalValue': '5/2'},
+                                                {'name': '2', 'fractionalValue': '2/1'}]},
+        {'marketName': 'Match goals', 'choiceGroup': '2.5', 'choices': [{'name': 'Over', 'fractionalValue': '4/6'},
+                                                                        {'name': 'Under', 'fractionalValue': '6/5'}]},
+        {'marketName': 'Unsupported', 'choices': [{'name': '1', 'fractionalValue': '1/1'}]},
+    ]}
+    q = m.sofascore.DfConverter()
+    q.convert_match_odds(7828232, odds)
+    matrix = q.odds_matrix()
+
+    assert matrix.shape == (1, len(m.sofascore.ODDS_COLUMNS))
+    assert matrix.dtypes.unique().tolist() == ['float32']
+    row = matrix.loc[7828232]
+    assert row['full_time_home'] == 2.5
+    assert row['2_5_under'] == pytest.approx(2.2)
+    assert m.sofascore.odds_to_dict(matrix.values[0]) == {'full_time_home': 2.5, 'full_time_draw': 3.5, 'full_time_away': 3.0,
+                                                         '2_5_over': 1.6667, '2_5_under': 2.2}
+
+
+def test_player_stats_record():
+    stat_info = {'groups': {
+        'summary': {'items': {'goals': {'name': "Goals", 'raw': 1}, 'minutesPlayed': {'name': "Minutes", 'value': "90'"}}},
+        'defence': {'items': {'interceptionWin': {'name': "Interceptions", 'value': "3"},
+                              'interceptionWon': {'name': "Interceptions", 'value': "4"}}},
+        'passing': {'items': {'accuratePass': {'name': "Accurate passes", 'value': "30 (88%)"}}},
+    }}
+    record = m.sofascore.parse_player_stats(stat_info)
+    stats = dict(zip(m.sofascore.PLAYER_STAT_COLUMNS, record))
+
+    assert len(record) == len(m.sofascore.PLAYER_STAT_COLUMNS)
+    assert stats['goals'] == 1
+    assert stats['minutesPlayed'] == 90
+    # The first key of the schema wins
+    assert stats['interceptionWon'] == 4
+    assert stats['accuratePass'] == 30
+    assert pd.isnull(stats['saves'])
+    assert 'saves' not in m.sofascore.player_stats_to_dict(record)
+    assert m.sofascore.player_stats_to_dict(record)['keyPass'] == ""
+    assert m.sofascore.player_stats_to_dict(m.sofascore.parse_player_stats({})) == {}
+
+
+def test_player_lineups_batch():
+    lineup = [{'player': {'id': 10 + i}, 'positionName': "Midfielder", 'positionNameshort': "M",
+               'substitute': i > 0, 'rating': "7.%s" % i} for i in range(3)]
+    single = m.sofascore.DfConverter()
+    for element in lineup:
+        single.convert_player_lineup(1, 44, element)
+    batch = m.sofascore.DfConverter()
+    batch.convert_player_lineups([(1, 44, element) for element in lineup])
+
+    pd.testing.assert_frame_equal(single._table('player_lineups'), batch._table('player_lineups'))
+    assert batch._table('player_lineups')['sc_player_id'].tolist() == [10, 11, 12]
+
+
+def test_convert_chunk_in_process_pool():
+    from concurrent.futures import ProcessPoolExecutor
+
+    odds = [(i, {'markets': [{'marketName': 'Full time', 'choices': [{'name': '1', 'fractionalValue': '%s/1' % i}]}]})
+            for i in range(1, 5)]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        chunks = list(pool.map(m.sofascore.convert_chunk, ['odds'] * 2, [odds[:2], odds[2:]]))
+
+    q = m.sofascore.DfConverter()
+    for chunk in chunks:
+        q.put(chunk)
+    batch = m.sofascore.DfConverter()
+    batch.convert_match_odds_batch(odds)
+
+    pd.testing.assert_frame_equal(q.odds_matrix(), batch.odds_matrix())
+    assert q.odds_matrix()['full_time_home'].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_process_pool_shared_and_shut_down():
+    from concurrent.futures import ThreadPoolExecutor
+
+    handler = m.sofascore.SofaHandler(config={'num_of_processes': 2})
+    with handler._process_pool_scope():
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            pools = list(pool.map(lambda _: handler._get_process_pool(), range(8)))
+        # Every tournament thread gets the same pool
+        assert len(set(map(id, pools))) == 1
+        with handler._process_pool_scope():
+            pass
+        assert handler._process_pool is pools[0]
+    # The last fetch shuts it down
+    assert handler._process_pool is None
+
+    # A single date of the tournaments shuts it down as well
+    def fetch_tournaments(curr_date, **kwargs):
+        assert handler._get_process_pool() is not None
+        return []
+
+    handler._fetch_tournaments = fetch_tournaments
+    handler._fetch_date(date(2019, 5, 5))
+    assert handler._process_pool is None
+
+
+def test_fetch_dates_with_sqlite_converter(tmpdir):
+    from functools import partial
+    from miner.sql import query_sqlite
+
+    class Requests(object):
+        def parse_by_date(self, date):
+            return {'sportItem': {'tournaments': [
+                {'tournament': {'uniqueId': 17, 'name': "Premier League"}, 'events': [{'id': 1}]},
+                {'tournament': {'uniqueId': 8, 'name': "LaLiga"}, 'events': [{'id': 2}]}]}}
+
+        def parse_event(self, event_id):
+            return {'event': {'id': event_id, 'season': {'id': 5}, 'tournament': {'uniqueId': 17},
+                              'formatedStartDate': '02.05.2019.', 'startTime': '18:30',
+                              'homeTeam': {'id': 10 + event_id}, 'awayTeam': {'id': 20 + event_id}}}
+
+        def parse_lineups_event(self, event_id):
+            return {'homeTeam': {'lineupsSorted': []}, 'awayTeam': {'lineupsSorted': []}}
+
+        def parse_match_odds(self, event_id):
+            return {}
+
+    database = str(tmpdir.join('miner.sqlite'))
+    handler = m.sofascore.SofaHandler(converter=partial(m.sofascore.SqliteConverter, database=database))
+    handler._req = Requests()
+    # The converters of the tournaments write the same database
+    assert handler.fetch_dates(start=date(2019, 5, 2)) == database
+    matches = query_sqlite(database, "SELECT match_id FROM matches ORDER BY match_id")
+    assert matches['match_id'].tolist() == [1, 2]
+
+
+def test_get_without_match_statistics():
+    assert len(m.sofascore.DfConverter().get()[0].index) == 0
+
+    q = m.sofascore.DfConverter()
+    q.convert_matches([{'event': {'id': 1, 'season': {'id': 5}, 'tournament': {'uniqueId': 17},
+                                  'homeTeam': {'id': 10}, 'awayTeam': {'id': 20}}}], [17])
+    matches, _ = q.get()
+    assert matches['match_id'].tolist() == [1]
+    assert pd.isnull(matches['home_score'].iloc[0])
+
+def test_converter_spills_above_memory_limit(tmpdir):
+    odds = [(i, {'markets': [{'marketName': 'Full time', 'choices': [{'name': '1', 'fractionalValue': '%s/1' % i}]}]})
+            for i in range(1, 5)]
+    q = m.sofascore.DfConverter(memory_limit=0, spill_dir=str(tmpdir))
+    in_memory = m.sofascore.DfConverter()
+    for row in odds:
+        q.convert_match_odds(*row)
+        in_memory.convert_match_odds(*row)
+
+    assert len(tmpdir.listdir()[0].listdir()) == 4
+    pd.testing.assert_frame_equal(q.odds_matrix(), in_memory.odds_matrix())
+    q.close()
+    assert tmpdir.listdir() == []
+
+
+def test_spilled_converter_joins_one_partition_at_a_time(tmpdir):
+    def event(mid):
+        return {'id': mid, 'season': {'id': 5}, 'tournament': {'uniqueId': 17}, 'formatedStartDate': '02.05.2019.',
+                'startTime': '18:30', 'homeTeam': {'id': 10}, 'awayTeam': {'id': 20}}
+
+    def odds(mid):
+        return {'markets': [{'marketName': 'Full time', 'choices': [{'name': '1', 'fractionalValue': '%s/1' % mid}]}]}
+
+    q = m.sofascore.DfConverter(memory_limit=0, spill_dir=str(tmpdir), spill_partitions=4)
+    in_memory = m.sofascore.DfConverter()
+    for converter in (q, in_memory):
+        for mid in range(1, 11):
+            converter.convert_matches([{'event': event(mid)}], [17])
+            converter.convert_match_odds(mid, odds(mid))
+            converter.convert_match_statistic({'event': dict(event(mid), homeScore={'current': mid}),
+                                               'statistics': {}, 'teamsForm': {}, 'vote': {}, 'managerDuel': {},
+                                               'h2hDuel': {}})
+
+    assert len(list(q.iter_get())) == 4
+    matches, _ = q.get()
+    expected, _ = in_memory.get()
+    pd.testing.assert_frame_equal(matches.sort_values('match_id').reset_index(drop=True),
+                                  expected.sort_values('match_id').reset_index(drop=True), check_like=True)
+
+def test_matches_without_referee_keep_integer_columns(tmpdir):
+    def event(mid, referee):
+        info = {'id': mid, 'season': {'id': 5}, 'tournament': {'uniqueId': 17}, 'formatedStartDate': '02.05.2019.',
+                'startTime': '18:30', 'status': {'type': 'finished'}, 'homeTeam': {'id': 10}, 'awayTeam': {'id': 20},
+                'venue': {'id': 3}}
+        if referee is not None:
+            info['referee'] = {'id': referee}
+        return {'event': info}
+
+    statements = []
+    q = m.sofascore.SqliteConverter(database=str(tmpdir.join('sofa.sqlite')),
+                                    writer=StatementWriter(statements.append))
+    q.convert_matches([event(1, 9), event(2, None)])
+    q.close()
+    # The referee id is rendered as an integer, and the missing one as null
+    assert "'finished',10,20,9,3)" in statements[0]
+    assert "'finished',10,20,null,3)" in statements[0]
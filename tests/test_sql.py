@@ -0,0 +1,224 @@
+import sqlite3
+from threading import Event, Thread
+
+import pytest
+
+pytest.importorskip('pypika')
+from miner.sql import TableSchema, TableUpdate, BulkInsert, StatementWriter, ExecutemanyWriter, SqliteWriter, \
+    BackgroundWriter, connect_sqlite
+
+
+TEAMS = TableSchema('teams', """
+    team_id INTEGER PRIMARY KEY,
+    team_name VARCHAR(100)
+    """)
+
+STATS = TableSchema('players_stats', """
+    sc_player_id integer,
+    match_id integer,
+    sc_stat blob,
+    PRIMARY KEY (sc_player_id, match_id),
+    FOREIGN KEY (match_id) REFERENCES Matches
+    """)
+
+
+def test_table_schema_from_ddl():
+    assert TEAMS.columns == ['team_id', 'team_name']
+    assert TEAMS.types == ['INTEGER', 'VARCHAR(100)']
+    assert TEAMS.key == ('team_id',)
+    assert STATS.columns == ['sc_player_id', 'match_id', 'sc_stat']
+    assert STATS.key == ('sc_player_id', 'match_id')
+
+
+def test_bulk_insert_batches():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE teams (team_id INTEGER PRIMARY KEY, team_name VARCHAR(100))")
+    statements = []
+
+    def sink(statement):
+        statements.append(statement)
+        conn.execute(statement)
+
+    bulk = BulkInsert(StatementWriter(sink), batch_size=2, tables=[TEAMS])
+    for team_id in range(5):
+        bulk.add(TEAMS, (team_id, "Team %s" % team_id))
+    assert len(statements) == 2
+    bulk.flush()
+
+    assert len(statements) == 3
+    assert statements[0].startswith('INSERT INTO "teams" VALUES (0,\'Team 0\'),(1,\'Team 1\')')
+    assert conn.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 5
+
+
+def test_bulk_insert_upserts_deduplicated_rows():
+    scores = TableSchema('scores', """
+        match_id INTEGER PRIMARY KEY,
+        home_score FLOAT
+        """, update=['home_score'])
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE teams (team_id INTEGER PRIMARY KEY, team_name VARCHAR(100))")
+    conn.execute("CREATE TABLE scores (match_id INTEGER PRIMARY KEY, home_score FLOAT)")
+    conn.execute("INSERT INTO teams VALUES (1, 'Stored')")
+    conn.execute("INSERT INTO scores VALUES (1, 0)")
+    statements = []
+
+    def sink(statement):
+        statements.append(statement)
+        conn.execute(statement)
+
+    bulk = BulkInsert(StatementWriter(sink), tables=[TEAMS, scores])
+    bulk.extend(TEAMS, [(1, "Liverpool"), (2, "Arsenal"), (2, "Arsenal FC")])
+    bulk.extend(scores, [(1, 1.0), (1, 2.0), (2, 3.0)])
+    bulk.flush()
+
+    assert statements[0].endswith('ON CONFLICT ("team_id") DO NOTHING')
+    assert conn.execute("SELECT * FROM teams ORDER BY team_id").fetchall() == [(1, 'Stored'), (2, 'Arsenal')]
+    assert conn.execute("SELECT * FROM scores ORDER BY match_id").fetchall() == [(1, 2.0), (2, 3.0)]
+
+
+def test_executemany_writer_uses_cached_template():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE players_stats (sc_player_id integer, match_id integer, sc_stat blob, "
+                 "PRIMARY KEY (sc_player_id, match_id))")
+    bulk = BulkInsert(ExecutemanyWriter(conn, paramstyle='?'), tables=[STATS])
+    bulk.extend(STATS, [(1, 10, {'goals': 1}), (2, 10, None), (1, 10, {'goals': 2})])
+    bulk.flush()
+
+    assert STATS.insert_sql('?') is STATS.insert_sql('?')
+    assert STATS.insert_sql('?') == 'INSERT INTO "players_stats" VALUES (?,?,?) ' \
+                                    'ON CONFLICT ("sc_player_id", "match_id") DO NOTHING'
+    assert conn.execute("SELECT * FROM players_stats ORDER BY sc_player_id").fetchall() == \
+        [(1, 10, '{"goals": 1}'), (2, 10, None)]
+
+
+def test_sqlite_database_with_batched_updates(tmpdir):
+    database = str(tmpdir.join('miner.sqlite'))
+    conn = connect_sqlite(database, [TEAMS, STATS])
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    indexes = [name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert 'players_stats_match_id_idx' in indexes
+
+    update = TableUpdate(STATS, ['sc_stat'])
+    bulk = BulkInsert(SqliteWriter(conn), tables=[TEAMS, STATS, update])
+    bulk.extend(STATS, [(1, 10, None), (2, 10, None)])
+    bulk.extend(update, [({'goals': 1}, 1, 10), ({'goals': 2}, 1, 10)])
+    bulk.flush()
+
+    assert update.update_sql('?') == 'UPDATE "players_stats" SET "sc_stat"=? WHERE "sc_player_id"=? AND "match_id"=?'
+    assert sqlite3.connect(database).execute("SELECT * FROM players_stats ORDER BY sc_player_id").fetchall() == \
+        [(1, 10, '{"goals": 2}'), (2, 10, None)]
+
+
+def test_background_writer_blocks_when_the_queue_is_full():
+    release = Event()
+    written = []
+
+    class SlowWriter(object):
+
+        def write(self, schema, rows):
+            release.wait(5)
+            written.extend(rows)
+
+        def flush(self):
+            pass
+
+    writer = BackgroundWriter(SlowWriter(), maxsize=1)
+    bulk = BulkInsert(writer, batch_size=1, tables=[TEAMS])
+    # The first batch is taken by the thread, the second one fills the queue and the third one has to wait
+    producer = Thread(target=lambda: [bulk.add(TEAMS, (team_id, "Team %s" % team_id)) for team_id in range(3)])
+    producer.start()
+    producer.join(0.5)
+    assert producer.is_alive()
+
+    release.set()
+    producer.join(5)
+    bulk.flush()
+    writer.close()
+    assert written == [(0, 'Team 0'), (1, 'Team 1'), (2, 'Team 2')]
+
+
+def test_background_writer_raises_the_error_of_the_thread():
+    written = []
+
+    class FailingWriter(object):
+
+        def write(self, schema, rows):
+            if rows[0][0] == 0:
+                raise sqlite3.OperationalError("database is locked")
+            written.extend(rows)
+
+        def flush(self):
+            pass
+
+    writer = BackgroundWriter(FailingWriter())
+    bulk = BulkInsert(writer, batch_size=1, tables=[TEAMS])
+    bulk.add(TEAMS, (0, 'Team 0'))
+    # The lost batch is not only logged, the caller gets its error
+    with pytest.raises(sqlite3.OperationalError):
+        bulk.flush()
+    with pytest.raises(sqlite3.OperationalError):
+        bulk.add(TEAMS, (1, 'Team 1'))
+    with pytest.raises(sqlite3.OperationalError):
+        writer.close()
+    assert written == []
+
+
+def test_table_update_renders_a_set_based_statement():
+    scores = TableSchema('scores', """
+        match_id INTEGER PRIMARY KEY,
+        home_score FLOAT,
+        away_score FLOAT
+        """)
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE scores (match_id INTEGER PRIMARY KEY, home_score FLOAT, away_score FLOAT)")
+    conn.executemany("INSERT INTO scores VALUES (?, NULL, NULL)", [(1,), (2,), (3,)])
+    statements = []
+
+    def sink(statement):
+        statements.append(statement)
+        conn.execute(statement)
+
+    update = TableUpdate(scores, ['home_score', 'away_score'])
+    bulk = BulkInsert(StatementWriter(sink), tables=[update])
+    bulk.extend(update, [(1, 0, 1), (2, 2, 2), (3, 1, 1)])
+    bulk.flush()
+
+    assert statements == ['WITH "v"("home_score","away_score","match_id") AS (VALUES (3,1,1),(2,2,2)) '
+                          'UPDATE "scores" SET "home_score"=CAST("v"."home_score" AS FLOAT),'
+                          '"away_score"=CAST("v"."away_score" AS FLOAT) FROM "v" '
+                          'WHERE "scores"."match_id"=CAST("v"."match_id" AS INTEGER)']
+    assert conn.execute("SELECT * FROM scores ORDER BY match_id").fetchall() == \
+        [(1, 3.0, 1.0), (2, 2.0, 2.0), (3, None, None)]
+
+
+def test_table_update_keeps_json_text_on_sqlite():
+    from pypika.dialects import SQLLiteQuery
+
+    odds = TableSchema('odds', """
+        match_id INTEGER,
+        fd_odds JSON
+        """)
+    conn = connect_sqlite(':memory:', [odds])
+    conn.executemany("INSERT INTO odds VALUES (?, NULL)", [(1,), (2,)])
+    update = TableUpdate(odds, ['fd_odds'], key=['match_id'])
+    bulk = BulkInsert(StatementWriter(conn.execute, query=SQLLiteQuery), tables=[update])
+    bulk.extend(update, [({'B365H': 1.57}, 1), (None, 2)])
+    bulk.flush()
+
+    assert conn.execute("SELECT match_id, fd_odds FROM odds ORDER BY match_id").fetchall() == \
+        [(1, '{"B365H":1.57}'), (2, None)]
+
+
+def test_sqlite_writers_of_a_run_commit_every_batch(tmpdir):
+    database = str(tmpdir.join('miner.sqlite'))
+    first = BulkInsert(SqliteWriter(connect_sqlite(database, [TEAMS])), batch_size=1, tables=[TEAMS])
+    second = BulkInsert(SqliteWriter(connect_sqlite(database, [TEAMS])), batch_size=1, tables=[TEAMS])
+    # The first writer does not hold the write lock of the database until its flush
+    first.add(TEAMS, (1, 'Liverpool'))
+    second.add(TEAMS, (2, 'Arsenal'))
+    first.add(TEAMS, (3, 'Chelsea'))
+    first.flush()
+    second.flush()
+
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT team_id FROM teams ORDER BY team_id").fetchall() == [(1,), (2,), (3,)]
@@ -0,0 +1,40 @@
+import miner as m
+
+
+def test_extractor_row_and_columns():
+    extractor = m.utils.Extractor([
+        ('id', ('event', 'id'), int),
+        ('name', ('event', 'homeTeam', 'name')),
+        ('rating', ('event', 'rating'), float, 0.0),
+    ])
+    payload = {'event': {'id': '7', 'homeTeam': {'name': 'Arsenal'}, 'rating': 'n/a'}}
+
+    assert extractor(payload) == {'id': 7, 'name': 'Arsenal', 'rating': 0.0}
+    assert extractor(None) == {'id': None, 'name': None, 'rating': 0.0}
+    assert extractor.columns([payload, {'event': {'id': 8}}]) == {'id': [7, 8], 'name': ['Arsenal', None], 'rating': [0.0, 0.0]}
+
+
+def test_concat_frames_union_schema():
+    import numpy as np
+    import pandas as pd
+
+    first = pd.DataFrame({'match_id': [1, 2], 'home_formation': ['4-4-2', '4-3-3']})
+    second = pd.DataFrame({'match_id': [3], 'home_rating_0': np.array([7.5], dtype=np.float32)})
+    result = m.utils.concat_frames([first, pd.DataFrame(), second])
+
+    assert result.columns.tolist() == ['match_id', 'home_formation', 'home_rating_0']
+    assert result['match_id'].tolist() == [1, 2, 3]
+    assert result['home_rating_0'].dtype == np.float32
+    pd.testing.assert_frame_equal(result, pd.concat([first, second], ignore_index=True, sort=False))
+
+
+def test_concat_frames_boxes_the_object_columns():
+    import pandas as pd
+
+    first = pd.DataFrame({'match_date': pd.to_datetime(['2019-05-02']), 'substitute': [True]})
+    second = pd.DataFrame({'match_date': ['unknown'], 'substitute': [False]})
+    result = m.utils.concat_frames([first, second])
+
+    assert result['match_date'].tolist() == [pd.Timestamp(2019, 5, 2), 'unknown']
+    assert result['substitute'].dtype == bool
+    pd.testing.assert_frame_equal(result, pd.concat([first, second], ignore_index=True, sort=False))